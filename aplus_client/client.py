@@ -1,5 +1,6 @@
 import requests
 import logging
+from hashlib import sha1
 from urllib.parse import urlsplit, parse_qsl as urlparse_qsl
 from cachetools import TTLCache
 
@@ -374,19 +375,80 @@ class AplusGraderClient(AplusClient):
     """
     Extension to A-Plus API client to support submssion_url based
     A-Plus grading backends.
+
+    If shared_cache is given, the exercise and course parts of the grading
+    data are stored there (e.g. django cache), as those are the same for all
+    submissions to the exercise. Only the submission specific part is loaded
+    from A-Plus for every request.
     """
-    def __init__(self, submission_url, **kwargs):
+    SHARED_CACHE_PREFIX = 'aplus_client.shared'
+    SHARED_CACHE_TIMEOUT = 15 * 60
+
+    def __init__(self, submission_url, shared_cache=None, shared_cache_timeout=None, **kwargs):
         super().__init__(**kwargs)
         url, params = self.normalize_url(submission_url)
         self.grading_url = url
         self.update_params(params)
+        self.shared_cache = shared_cache
+        self.shared_cache_timeout = shared_cache_timeout or self.SHARED_CACHE_TIMEOUT
+
+    def _load_shared_data(self, url, refresh=False):
+        key = '/'.join((self.SHARED_CACHE_PREFIX, sha1(url.encode('utf-8')).hexdigest()))
+        if refresh:
+            self.shared_cache.delete(key)
+            data = None
+        else:
+            data = self.shared_cache.get(key)
+        if data is None:
+            data = self._load_json_data(url)
+            if data:
+                self.shared_cache.set(key, data, self.shared_cache_timeout)
+        else:
+            logger.debug("shared cache hit for %r", url)
+        return data
 
-    @property
-    def grading_data(self):
+    def _expand_shared(self, parent, key, refresh=False):
+        """
+        Replaces the reference parent[key] with the full api object from the
+        shared cache. Nested api dicts are created from the same raw data,
+        so the data is not loaded again when the value is accessed.
+        """
+        value = parent.get(key)
+        if isinstance(value, dict):
+            url = value.get('url')
+        elif isinstance(value, str):
+            url, value = value, {}
+        else:
+            return None
+        if not url:
+            return None
+        data = self._load_shared_data(url, refresh=refresh)
+        if not data:
+            return None
+        value = dict(value, **data)
+        parent[key] = value
+        return value
+
+    def _load_grading_data(self, refresh=False):
         data = self.load_data(self.grading_url, ignore_cache=True)
+        if self.shared_cache is not None and isinstance(data, AplusApiDict):
+            exercise = self._expand_shared(data._data, 'exercise', refresh=refresh)
+            if exercise:
+                self._expand_shared(exercise, 'course', refresh=refresh)
         data = GraderInterface2(data)
         self.__dict__['grading_data'] = data
         return data
 
+    @property
+    def grading_data(self):
+        return self._load_grading_data()
+
+    def reload_grading_data(self):
+        """
+        Loads the grading data bypassing the shared cache, which is then
+        updated with the fresh exercise and course data.
+        """
+        return self._load_grading_data(refresh=True)
+
     def grade(self, data, **kwargs):
         return self.do_post(self.grading_url, data, **kwargs)
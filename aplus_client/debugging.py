@@ -1,5 +1,6 @@
 import json
 import logging
+from threading import Lock
 
 
 TEST_URL_PREFIX = "http://testserver.testserver/api/v2/"
@@ -22,10 +23,21 @@ class FakeResponse:
 
 
 class AplusClientDebugging:
+    TEST_DATA_PATH = TEST_DATA_PATH
+    # number of test requests made by all debugging clients (e.g. for load tests)
+    request_count = 0
+    _request_count_lock = Lock()
+
+    @classmethod
+    def count_request(cls):
+        with cls._request_count_lock:
+            AplusClientDebugging.request_count += 1
+
     def do_get(self, url, **kwargs):
         if url.startswith(TEST_URL_PREFIX):
+            self.count_request()
             furl = url[len(TEST_URL_PREFIX):].strip('/').replace('/', '__')
-            fn = ''.join((TEST_DATA_PATH, '/', furl, ".json"))
+            fn = ''.join((self.TEST_DATA_PATH, '/', furl, ".json"))
             logger.debug("making test GET '%s', file=%r", url, fn)
             with open(fn, 'r', encoding='utf-8') as f:
                 return FakeResponse(fn, 200, f.read())
@@ -33,6 +45,7 @@ class AplusClientDebugging:
 
     def do_post(self, url, data, **kwargs):
         if url.startswith(TEST_URL_PREFIX):
+            self.count_request()
             logger.debug("making test POST '%s', data=%r", url, data)
             return FakeResponse(url, 200, "{'result': 'accepted'}")
         return super().do_post(url, data, **kwargs)
@@ -0,0 +1,12 @@
+from django_settingsdict import SettingsDict
+
+
+app_settings = SettingsDict(
+    'APLUS_CLIENT',
+    defaults={
+        # Time to live in seconds per model label, e.g. {'feedback.student': 3600}
+        'TTL': {},
+        # Return stale objects immediately and refresh them in a celery task
+        'STALE_WHILE_REVALIDATE': False,
+    },
+)
@@ -1,12 +1,90 @@
+import copy
 import datetime
+import pickle
+from functools import partial
+from threading import Lock
 from urllib.parse import urlsplit
+from cachetools import TTLCache
 from django.apps import apps
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
+from .appsettings import app_settings
+from .tasks import refresh_inline, schedule_refresh
+
+
+class IdentityMap:
+    """
+    Process local and shared (django cache) storage for api objects.
+    Objects are keyed by (namespace_id, model, api_id) and namespaces by
+    hostname. Entries are removed by post_save and post_delete signals.
+    Other processes can't remove local entries, so those live only a short time.
+    """
+    PREFIX = 'aplus_client.idmap'
+
+    def __init__(self, local_timeout=60, shared_timeout=60*60, local_size=1024):
+        self.local = TTLCache(maxsize=local_size, ttl=local_timeout)
+        self.shared_timeout = shared_timeout
+        # keys waiting for a commit, delete() drops the key so a stale set isn't stored
+        self.pending = TTLCache(maxsize=local_size, ttl=local_timeout)
+        self.lock = Lock()
+
+    def object_key(self, model, namespace_id, api_id):
+        model = model._meta.concrete_model
+        return '/'.join((self.PREFIX, model._meta.label_lower, str(namespace_id), str(api_id)))
+
+    def namespace_key(self, hostname):
+        return '/'.join((self.PREFIX, 'namespace', hostname))
+
+    def get(self, key):
+        # objects are stored pickled, so every caller gets its own copy
+        with self.lock:
+            data = self.local.get(key)
+        if data is None:
+            data = cache.get(key)
+            if data is None:
+                return None
+            with self.lock:
+                self.local[key] = data
+        return pickle.loads(data)
+
+    def set(self, key, obj):
+        # related objects (e.g. from select_related) are invalidated separately, so
+        # don't store them with the object; they are loaded again when accessed
+        obj = copy.copy(obj)
+        obj._state.fields_cache = {}
+        obj.__dict__.pop('_prefetched_objects_cache', None)
+        # object may come from an uncommitted transaction, so store it only after a commit
+        data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        token = object()
+        with self.lock:
+            self.pending[key] = token
+        transaction.on_commit(partial(self._store, key, data, token))
+
+    def _store(self, key, data, token):
+        with self.lock:
+            if self.pending.get(key) is not token:
+                # invalidated (or set again) after this set, data is out of date
+                return
+            del self.pending[key]
+            self.local[key] = data
+        cache.set(key, data, self.shared_timeout)
+
+    def delete(self, key):
+        with self.lock:
+            self.pending.pop(key, None)
+            self.local.pop(key, None)
+        cache.delete(key)
+
+
+IDENTITY_MAP = IdentityMap()
+
 
 class ApiNamespace(models.Model):
     domain = models.CharField(max_length=255, db_index=True)
@@ -21,7 +99,11 @@ class ApiNamespace(models.Model):
         hostname = urlsplit(url).hostname
         if not hostname:
             raise ValueError("Url doesn't have hostname")
-        obj, _created = cls.objects.get_or_create(domain=hostname)
+        key = IDENTITY_MAP.namespace_key(hostname)
+        obj = IDENTITY_MAP.get(key)
+        if obj is None:
+            obj, _created = cls.objects.get_or_create(domain=hostname)
+            IDENTITY_MAP.set(key, obj)
         return obj
 
     def __str__(self):
@@ -32,20 +114,54 @@ class CachedApiQuerySet(models.QuerySet):
     def get_new_or_updated(self, api_obj, **kwargs):
         obj, created = self.get_or_create(api_obj, **kwargs)
         if not created and obj.should_be_updated:
-            self.update_object(obj, api_obj, **kwargs)
-            obj.save()
+            if app_settings.STALE_WHILE_REVALIDATE and not refresh_inline.get():
+                schedule_refresh(obj, api_obj)
+            else:
+                self.update_object(obj, api_obj, **kwargs)
+                obj.save()
         return obj, created
 
     def get_or_create(self, api_obj, **kwargs): # pylint: disable=arguments-renamed
-        select_related = kwargs.pop('select_related', None)
         try:
-            qs = self
-            if select_related:
-                qs = qs.select_related(*select_related)
-            return qs.get(api_id=api_obj.id, **kwargs), False
+            return self.get_by_api_id(api_obj.id, **kwargs), False
         except ObjectDoesNotExist:
+            kwargs.pop('select_related', None)
             return self.create(api_obj, **kwargs), True
 
+    def get_identity_key(self, api_id, kwargs):
+        """
+        Returns identity map key, if the lookup is limited only by the namespace
+        """
+        if self.query.has_filters() or len(kwargs) != 1:
+            return None
+        if 'namespace' in kwargs:
+            namespace_id = kwargs['namespace'].id
+        elif 'namespace_id' in kwargs:
+            namespace_id = kwargs['namespace_id']
+        else:
+            return None
+        return IDENTITY_MAP.object_key(self.model, namespace_id, api_id)
+
+    def get_by_api_id(self, api_id, **kwargs):
+        """
+        Returns object with api_id and filters in kwargs. Objects in a namespace
+        are resolved from the identity map, when possible.
+        """
+        select_related = kwargs.pop('select_related', None)
+        api_id = int(api_id)
+        key = self.get_identity_key(api_id, kwargs)
+        if key:
+            obj = IDENTITY_MAP.get(key)
+            if obj is not None:
+                return obj
+        qs = self
+        if select_related:
+            qs = qs.select_related(*select_related)
+        obj = qs.get(api_id=api_id, **kwargs)
+        if key:
+            IDENTITY_MAP.set(key, obj)
+        return obj
+
     def create(self, api_obj, **kwargs): # pylint: disable=arguments-differ
         obj = self.model(api_id=api_obj.id)
         self.update_object(obj, api_obj, **kwargs)
@@ -74,10 +190,21 @@ class CachedApiObject(models.Model):
     url = models.URLField()
     updated = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def get_ttl(cls):
+        ttl = app_settings.TTL.get(cls._meta.label_lower)
+        if ttl is None:
+            return cls.TTL
+        return datetime.timedelta(seconds=ttl)
+
     @property
     def should_be_updated(self):
         age = timezone.now() - self.updated
-        return age > self.TTL
+        return age > self.get_ttl()
+
+    @property
+    def identity_namespace_id(self):
+        raise NotImplementedError("Subclass should define .identity_namespace_id property")
 
     def update_using(self, client):
         data = client.load_data(self.url)
@@ -146,6 +273,10 @@ class NamespacedApiObject(CachedApiObject):
         abstract = True
         unique_together = ('namespace', 'api_id')
 
+    @property
+    def identity_namespace_id(self):
+        return self.namespace_id
+
     def update_with(self, api_obj, **kwargs):
         kwargs.setdefault('namespace', self.namespace)
         super().update_with(api_obj, **kwargs)
@@ -181,3 +312,23 @@ class NestedApiObject(CachedApiObject):
     @property
     def namespace(self):
         raise NotImplementedError("Subclass should define .namespace property")
+
+    @property
+    def identity_namespace_id(self):
+        *path, name = self.NAMESPACE_FILTER.split('__')
+        obj = self
+        for attr in path:
+            obj = getattr(obj, attr)
+        return getattr(obj, name + '_id')
+
+
+@receiver([post_save, post_delete])
+def identity_map_invalidate(sender, instance, **kwargs): # pylint: disable=unused-argument
+    if isinstance(instance, CachedApiObject):
+        try:
+            namespace_id = instance.identity_namespace_id
+        except ObjectDoesNotExist:
+            return
+        IDENTITY_MAP.delete(IDENTITY_MAP.object_key(sender, namespace_id, instance.api_id))
+    elif isinstance(instance, ApiNamespace):
+        IDENTITY_MAP.delete(IDENTITY_MAP.namespace_key(instance.domain))
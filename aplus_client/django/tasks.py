@@ -0,0 +1,129 @@
+import json
+import logging
+from contextvars import ContextVar
+from hashlib import sha1
+from celery import shared_task
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+
+from ..client import AplusClient, AplusTokenClient, AplusApiDict
+from ..debugging import AplusClientDebugging
+
+
+logger = logging.getLogger('aplus_client.django')
+
+REFRESH_KEY_PREFIX = 'aplus_client.refresh'
+CLIENT_STATE_PREFIX = 'aplus_client.client_state'
+REFRESH_LOCK_TIMEOUT = 5 * 60
+STATS_KEYS = {
+    'stale_served': 'aplus_client.stats.stale_served',
+    'refresh_scheduled': 'aplus_client.stats.refresh_scheduled',
+    'refresh_done': 'aplus_client.stats.refresh_done',
+    'refresh_failed': 'aplus_client.stats.refresh_failed',
+}
+
+# When set, stale objects are updated inline (e.g. related objects in a refresh task)
+refresh_inline = ContextVar('aplus_client_refresh_inline', default=False)
+
+
+def incr_stat(name):
+    key = STATS_KEYS[name]
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # key expired between add and incr
+            cache.add(key, 1, None)
+
+
+def get_stats():
+    values = cache.get_many(STATS_KEYS.values())
+    return {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def get_client_state(client):
+    """Returns json serializable data to create a similar client in a task"""
+    return {
+        'token': getattr(client, 'token', None),
+        'params': dict(client.get_params()),
+        'version': client.api_version,
+        'debug': isinstance(client, AplusClientDebugging),
+    }
+
+
+def store_client_state(state, timeout):
+    """
+    Stores the client state in the cache and returns its key. Tasks get
+    only the key, so the api token and the grader params are not written
+    to the broker or to the task logs.
+    """
+    digest = sha1(json.dumps(state, sort_keys=True).encode('utf-8')).hexdigest()
+    key = '/'.join((CLIENT_STATE_PREFIX, digest))
+    cache.set(key, state, timeout)
+    return key
+
+
+def create_client(state):
+    kwargs = {'version': state['version'], 'debug_enabled': state['debug']}
+    if state['token']:
+        client = AplusTokenClient(state['token'], **kwargs)
+    else:
+        client = AplusClient(**kwargs)
+    client.update_params(state['params'])
+    return client
+
+
+def schedule_refresh(obj, api_obj):
+    """
+    Schedules a refresh for a stale object. Only one refresh per object is
+    scheduled at a time.
+    """
+    incr_stat('stale_served')
+    client = getattr(api_obj, '_client', None)
+    if client is None:
+        return
+    model_label, pk = obj._meta.label_lower, obj.pk
+    state = get_client_state(client)
+
+    def schedule():
+        # lock is taken only after a commit, so a rollback doesn't leave it behind
+        key = '/'.join((REFRESH_KEY_PREFIX, model_label, str(pk)))
+        if not cache.add(key, 1, REFRESH_LOCK_TIMEOUT):
+            return
+        state_key = store_client_state(state, REFRESH_LOCK_TIMEOUT)
+        incr_stat('refresh_scheduled')
+        refresh_api_object.delay(model_label, pk, state_key)
+    transaction.on_commit(schedule)
+
+
+@shared_task(bind=True, ignore_result=True)
+def refresh_api_object(self, model_label, pk, client_state_key): # pylint: disable=unused-argument
+    key = '/'.join((REFRESH_KEY_PREFIX, model_label, str(pk)))
+    token = refresh_inline.set(True)
+    try:
+        model = apps.get_model(model_label)
+        try:
+            obj = model.objects.get(pk=pk)
+        except model.DoesNotExist:
+            return
+        if not obj.should_be_updated:
+            return
+        client_state = cache.get(client_state_key)
+        if client_state is None:
+            logger.warning("Client for refreshing %s %d has expired", model_label, pk)
+            incr_stat('refresh_failed')
+            return
+        client = create_client(client_state)
+        api_obj = client.load_data(obj.url)
+        if not isinstance(api_obj, AplusApiDict):
+            logger.warning("Failed to refresh %s %d from '%s'", model_label, pk, obj.url)
+            incr_stat('refresh_failed')
+            return
+        with transaction.atomic():
+            model.objects.all().update_object(obj, api_obj)
+            obj.save()
+        incr_stat('refresh_done')
+    finally:
+        refresh_inline.reset(token)
+        cache.delete(key)
@@ -23,6 +23,20 @@ class ServiceStatusData(LoginRequiredMixin, TemplateView):
         context['dynamic_form_cache_size'] = len(DynamicFeedbacForm.FORM_CACHE)
         context['dynamic_form_cache_max'] = DynamicFeedbacForm.FORM_CACHE.max_size
 
+        from django.db.models import Count, Q # pylint: disable=import-outside-toplevel
+        from feedback.models import FeedbackInbox # pylint: disable=import-outside-toplevel
+        context['inbox'] = FeedbackInbox.objects.aggregate(
+            queued=Count('id'),
+            failed=Count('id', filter=Q(attempts__gte=FeedbackInbox.MAX_ATTEMPTS)),
+        )
+        context['inbox_async'] = app_settings.ASYNC_INGESTION
+
+        # pylint: disable-next=import-outside-toplevel
+        from aplus_client.django.appsettings import app_settings as aplus_settings
+        from aplus_client.django.tasks import get_stats # pylint: disable=import-outside-toplevel
+        context['api_refresh'] = get_stats()
+        context['api_refresh_async'] = aplus_settings.STALE_WHILE_REVALIDATE
+
         from jutut.celery import app # pylint: disable=import-outside-toplevel
         i = app.control.inspect()
         context['celery_stats'] = celery_stats = {}
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils.translation import gettext_lazy as _
 from django_colortag.admin import ColorTagAdmin
 
 from .models import (
@@ -6,9 +7,11 @@ from .models import (
     Course,
     Exercise,
     Feedback,
+    FeedbackInbox,
     FeedbackTag,
     ContextTag,
 )
+from .tasks import schedule_inbox_processing
 
 
 class CachedAdmin(admin.ModelAdmin):
@@ -16,6 +19,22 @@ class CachedAdmin(admin.ModelAdmin):
         return False
 
 
+class FeedbackInboxAdmin(admin.ModelAdmin):
+    """
+    Rows, which failed FeedbackInbox.MAX_ATTEMPTS times, are not processed
+    anymore. Those can be retried or deleted from here.
+    """
+    list_display = ('id', 'created', 'submission_url', 'attempts', 'claimed', 'last_error')
+    list_filter = ('attempts',)
+    actions = ['retry']
+
+    @admin.action(description=_("Retry processing selected inbox feedbacks"))
+    def retry(self, request, queryset):
+        count = queryset.update(attempts=0, claimed=None)
+        schedule_inbox_processing()
+        self.message_user(request, _("%d inbox feedbacks will be processed again.") % (count,))
+
+
 class FeedbackTagAdmin(ColorTagAdmin):
     fields = ColorTagAdmin.fields + (
         'course',
@@ -26,5 +45,6 @@ admin.site.register(Student, CachedAdmin)
 admin.site.register(Course, CachedAdmin)
 admin.site.register(Exercise, CachedAdmin)
 admin.site.register(Feedback, CachedAdmin)
+admin.site.register(FeedbackInbox, FeedbackInboxAdmin)
 admin.site.register(FeedbackTag, FeedbackTagAdmin)
 admin.site.register(ContextTag, admin.ModelAdmin)
@@ -1,19 +1,36 @@
+import random
+import re
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from hashlib import sha1
 from typing import Optional
 
+from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.core.cache import cache
-from django.core.exceptions import ValidationError
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import transaction
+from django.db.models import Count
 from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
+from django.utils.crypto import get_random_string
+from django.utils.html import escape
 
 from aplus_client.client import AplusTokenClient
+from jutut.appsettings import app_settings
 
 from .models import (
     Site,
     Course,
+    Exercise,
     Student,
+    StudentTag,
     Feedback,
     FeedbackForm,
     FeedbackTag,
+    ContextTag,
+    ContextTagMatcher,
+    NotrespondedCounter,
 )
 from .background_helpers import (
     get_bg_questionnaires,
@@ -23,40 +40,194 @@ from .background_helpers import (
 
 class FormCache:
     """
-    Short time buffer for feedback form classes
+    Request time buffer for feedback form classes.
+    prefetch() loads forms of the feedbacks with one query and shares the
+    form instances between the feedbacks, so each form class is resolved
+    only once. Number of form objects created by get() is stored in built.
     """
     def __init__(self):
-        self.cache = {}
+        self.forms = {}
+        self.built = 0
+
+    def prefetch(self, feedbacks):
+        feedbacks = list(feedbacks)
+        missing = set(f.form_id for f in feedbacks if f.form_id not in self.forms)
+        if missing:
+            self.forms.update((form.id, form) for form in FeedbackForm.objects.filter(id__in=missing))
+        for feedback in feedbacks:
+            form = self.forms.get(feedback.form_id)
+            if form is not None:
+                feedback.form = form
+
+    def get_class(self, feedback):
+        form = self.forms.get(feedback.form_id)
+        if form is None:
+            form = self.forms[feedback.form_id] = feedback.form
+        return form.form_class_or_dummy
 
     def get(self, feedback):
-        cache = self.cache
-        form_id = feedback.form_id
-        form_class = cache.get(form_id)
-        if not form_class:
-            form_class = feedback.get_form_class(True)
-            cache[form_id] = form_class
-        return form_class(data=feedback.form_data)
+        self.built += 1
+        return self.get_class(feedback)(data=feedback.form_data)
+
+
+# Stored values of Cached. Other values in the keys of Cached are handled
+# as missing, e.g. values stored by older versions.
+CacheEntry = namedtuple('CacheEntry', ('value', 'recreate_at'))
 
 
 class Cached:
+    """
+    Value created with get_obj, which is stored in the cache.
+
+    Values are stored with the time, when they should be recreated.
+    Timeouts are jittered, so values created together don't expire
+    together. When a value is old or missing, only the request, which
+    gets the lock (cache.add), runs get_obj. Others use the old value, or
+    wait for a while for the new value, when there is none. clear() only
+    marks the value old, so it is recreated by the next request. Values are
+    stored in CacheEntry, so also None and other empty values are cached.
+    """
+    JITTER = 0.1 # part of the timeout
+    LOCK_TIMEOUT = 30 # seconds, also the time old values are available
+    LOCK_WAIT = 2 # seconds to wait for the lock holder
+    RECREATE = object() # returned by lookup, when the value needs to be created
+
     def __init__(self, prefix=None, timeout=None):
         self.prefix = prefix or self.__class__.__name__
         self.timeout = timeout or 60 * 60
 
+    @property
+    def entry_timeout(self):
+        return int(self.timeout) + self.LOCK_TIMEOUT
+
     def get_suffix(self, *args):
         return '-'.join(str(x) for x in args)
 
+    def get_key(self, *args):
+        return '/'.join((self.prefix, str(self.get_suffix(*args))))
+
+    def get_lock_key(self, key):
+        return key + '/lock'
+
     def get(self, *args):
-        key = '/'.join((self.prefix, str(self.get_suffix(*args))))
-        obj = cache.get(key)
-        if obj is None:
+        key = self.get_key(*args)
+        return self.resolve(key, cache.get(key), args)
+
+    def lookup(self, key, entry):
+        """
+        Returns tuple (value, locked) for the cache entry. Value is RECREATE,
+        when the caller should create it, and locked tells if the caller
+        holds the lock, which it has to release after storing the value.
+        """
+        if isinstance(entry, CacheEntry):
+            if time.time() < entry.recreate_at or not cache.add(self.get_lock_key(key), 1, self.LOCK_TIMEOUT):
+                return entry.value, False
+            return self.RECREATE, True
+        if cache.add(self.get_lock_key(key), 1, self.LOCK_TIMEOUT):
+            return self.RECREATE, True
+        deadline = time.time() + self.LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if isinstance(entry, CacheEntry):
+                return entry.value, False
+        # lock holder is too slow or failed
+        return self.RECREATE, False
+
+    def resolve(self, key, entry, args):
+        """Returns the value of the cache entry, which is recreated if needed"""
+        value, locked = self.lookup(key, entry)
+        if value is self.RECREATE:
+            value = self.recreate(key, args, locked)
+        return value
+
+    def make_entry(self, obj):
+        timeout = self.timeout * random.uniform(1 - self.JITTER, 1)
+        return CacheEntry(obj, time.time() + timeout)
+
+    def recreate(self, key, args, locked=True):
+        try:
             obj = self.get_obj(*args)
-            cache.set(key, obj, self.timeout)
+            cache.set(key, self.make_entry(obj), self.entry_timeout)
+        finally:
+            if locked:
+                cache.delete(self.get_lock_key(key))
         return obj
 
     def clear(self, *args):
-        key = '/'.join((self.prefix, str(self.get_suffix(*args))))
-        cache.delete(key)
+        # keep the old value for a moment, so the other requests don't wait
+        # for the one recreating it (stale while revalidate)
+        key = self.get_key(*args)
+        entry = cache.get(key)
+        if isinstance(entry, CacheEntry):
+            cache.set(key, entry._replace(recreate_at=0), self.LOCK_TIMEOUT)
+        else:
+            cache.delete(key)
+
+
+class CacheBatch:
+    """
+    Request scoped batch of cache reads. Values are requested with add()
+    for Cached objects (and other objects with get_key, get_obj and timeout)
+    and with add_key() for plain cache keys. Requested values are read with
+    a single cache.get_many, when the first one of them is used. Old and
+    missing values of Cached objects are locked with Cached.lookup, so
+    they are created by a single request. Missing values are created with
+    get_obj and stored with a single cache.set_many per timeout, after
+    which the locks are released with a single cache.delete_many.
+    Missing plain keys are None.
+    """
+    def __init__(self):
+        self.pending = {}
+        self.values = {}
+
+    def add(self, cached, *args):
+        key = cached.get_key(*args)
+        if key not in self.values:
+            self.pending.setdefault(key, (cached, args))
+        return key
+
+    def add_key(self, key):
+        if key not in self.values:
+            self.pending.setdefault(key, None)
+        return key
+
+    def load(self):
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        found = cache.get_many(list(pending))
+        missing = {}
+        locks = []
+        try:
+            for key, source in pending.items():
+                value = found.get(key)
+                if source is not None:
+                    cached, args = source
+                    if isinstance(cached, Cached):
+                        value, locked = cached.lookup(key, value)
+                        if locked:
+                            locks.append(cached.get_lock_key(key))
+                        if value is Cached.RECREATE:
+                            value = cached.get_obj(*args)
+                            missing.setdefault(cached.entry_timeout, {})[key] = cached.make_entry(value)
+                    elif value is None:
+                        value = cached.get_obj(*args)
+                        missing.setdefault(cached.timeout, {})[key] = value
+                self.values[key] = value
+            for timeout, values in missing.items():
+                cache.set_many(values, timeout)
+        finally:
+            if locks:
+                cache.delete_many(locks)
+
+    def __getitem__(self, key):
+        if key not in self.values:
+            self.load()
+        return self.values.get(key)
+
+    def get(self, cached, *args):
+        return self[self.add(cached, *args)]
 
 
 class CachedSites(Cached):
@@ -88,27 +259,28 @@ def post_course_save(sender, instance, **kwargs): # pylint: disable=unused-argum
 
 
 class CachedNotrespondedCount(Cached):
+    """Mirror of the NotrespondedCounter rows of a course"""
+    # fields, which change the count, when saved
+    FIELDS = frozenset(('exercise', 'superseded_by', 'response_time'))
+
     def get_suffix(self, course): # pylint: disable=arguments-differ
         return course.id
 
     def get_obj(self, course):
-        return Feedback.objects.get_notresponded(course_id=course.id).count()
+        return NotrespondedCounter.get_count(course_id=course.id)
 
 
 CachedNotrespondedCount = CachedNotrespondedCount(timeout=60*10)
 
 @receiver(post_save, sender=Feedback)
-def notresponded_post_feedback_save(sender, instance, **kwargs): # pylint: disable=unused-argument
-    feedback = instance
-    CachedNotrespondedCount.clear(feedback.exercise.course)
-
-@receiver(m2m_changed, sender=FeedbackTag.conversations.through)
 # pylint: disable-next=unused-argument
-def notresponded_post_feedback_tag_change(sender, instance, action, reverse, **kwargs):
-    if action not in ('post_add', 'post_remove', 'post_clear'):
+def notresponded_post_feedback_save(sender, instance, created, update_fields, **kwargs):
+    # e.g. upload status updates don't change the count
+    if not created and update_fields is not None and not CachedNotrespondedCount.FIELDS.intersection(update_fields):
         return
-    course = instance.exercise.course if reverse else instance.course
-    CachedNotrespondedCount.clear(course)
+    course = instance.course
+    # counters are updated by the database in the same transaction
+    transaction.on_commit(lambda: CachedNotrespondedCount.clear(course))
 
 
 class CachedTags(Cached):
@@ -132,6 +304,67 @@ def post_tag_delete(sender, instance, **kwargs): # pylint: disable=unused-argume
     CachedTags.clear(tag.course)
 
 
+class CachedFilterChoices(Cached):
+    """
+    Choices of the feedback filter form of a course. Exercise names are
+    localized when used, so the same object works for all languages.
+    """
+    def get_suffix(self, course): # pylint: disable=arguments-differ
+        return course.id
+
+    def get_obj(self, course):
+        return {
+            'exercises': list(Exercise.objects.filter(course=course).values_list('id', 'display_name')),
+            'staff': [(user.id, str(user)) for user in course.staff.exclude(is_staff=True)],
+        }
+
+
+CachedFilterChoices = CachedFilterChoices()
+
+@receiver(post_save, sender=Exercise)
+def filter_choices_post_exercise_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    CachedFilterChoices.clear(instance.course)
+
+@receiver(post_delete, sender=Exercise)
+def filter_choices_post_exercise_delete(sender, instance, **kwargs): # pylint: disable=unused-argument
+    CachedFilterChoices.clear(instance.course)
+
+@receiver(m2m_changed, sender=Course.staff.through)
+# pylint: disable-next=unused-argument
+def filter_choices_post_staff_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            CachedFilterChoices.clear(instance)
+    elif action in ('post_add', 'post_remove'):
+        for course in Course.objects.filter(id__in=pk_set):
+            CachedFilterChoices.clear(course)
+    elif action == 'pre_clear':
+        # post_clear doesn't list the removed courses
+        for course in instance.courses.all():
+            CachedFilterChoices.clear(course)
+
+
+class CachedContextTagMatcher(Cached):
+    def get_suffix(self, course): # pylint: disable=arguments-differ
+        return course.id
+
+    def get_obj(self, course):
+        return ContextTagMatcher(ContextTag.objects.filter(course=course))
+
+
+CachedContextTagMatcher = CachedContextTagMatcher()
+
+@receiver(post_save, sender=ContextTag)
+def post_context_tag_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    tag = instance
+    CachedContextTagMatcher.clear(tag.course)
+
+@receiver(post_delete, sender=ContextTag)
+def post_context_tag_delete(sender, instance, **kwargs): # pylint: disable=unused-argument
+    tag = instance
+    CachedContextTagMatcher.clear(tag.course)
+
+
 class CachedForm(Cached):
     def get_suffix(self, key, spec_getter=None, i18n_getter=None): # pylint: disable=arguments-differ unused-argument
         return key
@@ -150,6 +383,194 @@ class CachedForm(Cached):
 CachedForm = CachedForm(timeout=60*60)
 
 
+class CachedFormHtml(Cached):
+    """
+    Rendered feedback form pages. Request specific urls and the random
+    part of the form id are rendered as placeholders, which are replaced
+    with the real values when used.
+    """
+    POST_URL = 'jutut-placeholder-post-url'
+    APLUS_PATH = 'jutut-placeholder-aplus-path'
+    FORM_ID = 'jututplaceholderformid'
+
+    # pylint: disable-next=arguments-differ unused-argument
+    def get_suffix(self, form_sha1, language, path_key, auto_id, render=None):
+        # path_key may be long and contain any url characters
+        path = sha1('\n'.join((path_key, auto_id)).encode('utf-8')).hexdigest()
+        return '-'.join((form_sha1, language or '', path))
+
+    def get_obj(self, form_sha1, language, path_key, auto_id, render): # pylint: disable=unused-argument
+        return render(self.POST_URL, self.APLUS_PATH, self.FORM_ID)
+
+    def render(self, html, post_url, aplus_path):
+        # forms must have unique ids, as a page may contain the same form many times
+        return (html
+            .replace(self.POST_URL, escape(post_url))
+            .replace(self.APLUS_PATH, escape(aplus_path))
+            .replace(self.FORM_ID, get_random_string(8))
+        )
+
+
+CachedFormHtml = CachedFormHtml(timeout=60*60)
+
+
+class CachedVersions:
+    """
+    Version strings of cached content. Version is changed, when the content
+    changes, so the cache keys, which include the version, are not used anymore.
+    """
+    def __init__(self, prefix=None, timeout=None):
+        self.prefix = prefix or self.__class__.__name__
+        self.timeout = timeout or 60 * 60 * 24
+
+    def get_key(self, obj_id):
+        return '/'.join((self.prefix, str(obj_id)))
+
+    def get_obj(self, obj_id): # pylint: disable=unused-argument
+        return get_random_string(8)
+
+    def get_many(self, obj_ids):
+        keys = {self.get_key(obj_id): obj_id for obj_id in obj_ids}
+        versions = cache.get_many(keys)
+        missing = {key: self.get_obj(obj_id) for key, obj_id in keys.items() if key not in versions}
+        if missing:
+            cache.set_many(missing, self.timeout)
+            versions.update(missing)
+        return {keys[key]: version for key, version in versions.items()}
+
+    def get(self, obj_id):
+        return self.get_many([obj_id])[obj_id]
+
+    def bump(self, obj_id):
+        # readers could cache old data with the new version before the commit
+        key = self.get_key(obj_id)
+        transaction.on_commit(lambda: cache.set(key, get_random_string(8), self.timeout))
+
+
+ConversationVersions = CachedVersions(prefix='ConversationVersion')
+CourseMarkupVersions = CachedVersions(prefix='CourseMarkupVersion')
+CourseFeedbackVersions = CachedVersions(prefix='CourseFeedbackVersion')
+# names are shown in the conversations of all courses
+StudentVersions = CachedVersions(prefix='StudentVersion')
+ExerciseVersions = CachedVersions(prefix='ExerciseVersion')
+
+@receiver(post_save, sender=Student)
+def student_version_post_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    StudentVersions.bump(instance.id)
+
+@receiver(post_save, sender=Exercise)
+def exercise_version_post_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    ExerciseVersions.bump(instance.id)
+
+@receiver(post_save, sender=Feedback)
+def conversation_version_post_feedback_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    ConversationVersions.bump(instance.conversation_id)
+
+@receiver(m2m_changed, sender=FeedbackTag.conversations.through)
+# pylint: disable-next=unused-argument
+def conversation_version_post_tag_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        ConversationVersions.bump(instance.id)
+    elif pk_set:
+        for conversation_id in pk_set:
+            ConversationVersions.bump(conversation_id)
+    else:
+        # post_clear doesn't list the removed conversations
+        CourseMarkupVersions.bump(instance.course_id)
+
+@receiver(post_save, sender=Feedback)
+def course_feedback_version_post_feedback_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    CourseFeedbackVersions.bump(instance.course_id)
+
+@receiver(m2m_changed, sender=FeedbackTag.conversations.through)
+# pylint: disable-next=unused-argument
+def course_feedback_version_post_tag_change(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    CourseFeedbackVersions.bump(instance.course_id)
+
+@receiver(post_save, sender=Course)
+def course_markup_version_post_course_save(sender, instance, **kwargs): # pylint: disable=unused-argument
+    # includes update of student tags (see StudentTag.update_from_api)
+    CourseMarkupVersions.bump(instance.id)
+
+@receiver(post_save, sender=FeedbackTag)
+@receiver(post_delete, sender=FeedbackTag)
+@receiver(post_save, sender=StudentTag)
+@receiver(post_delete, sender=StudentTag)
+@receiver(post_save, sender=ContextTag)
+@receiver(post_delete, sender=ContextTag)
+def course_markup_version_post_tag_change(sender, instance, **kwargs): # pylint: disable=unused-argument
+    CourseMarkupVersions.bump(instance.course_id)
+
+
+class CachedConversationCount(Cached):
+    """Number of conversations in a filtered feedback queryset of a course"""
+    def get(self, course, queryset): # pylint: disable=arguments-differ
+        try:
+            return super().get(course, queryset)
+        except EmptyResultSet:
+            # filters can't match anything, e.g. an empty choice list
+            return 0
+
+    def get_suffix(self, course, queryset): # pylint: disable=arguments-differ
+        # parameters separately, as str(query) doesn't quote them
+        sql, params = queryset.query.sql_with_params()
+        query = sha1(repr((sql, params)).encode('utf-8')).hexdigest()
+        # filters may use student tags, which are updated with the course
+        return '-'.join((
+            str(course.id),
+            CourseFeedbackVersions.get(course.id),
+            CourseMarkupVersions.get(course.id),
+            query,
+        ))
+
+    def get_obj(self, course, queryset): # pylint: disable=unused-argument
+        return queryset.order_by().aggregate(
+            count=Count('conversation_id', distinct=True),
+        )['count']
+
+
+CachedConversationCount = CachedConversationCount(timeout=60*10)
+
+
+class CachedConversationHtml(Cached):
+    """
+    Rendered conversations in the feedback lists. Request specific values
+    and relative times (e.g. "3 minutes ago") are rendered as placeholders,
+    which are replaced when used. Versions of the conversation, course,
+    student and exercise are part of the key.
+    """
+    CSRF_TOKEN = 'jutut-placeholder-csrf-token'
+    SUCCESS_URL = 'jutut-placeholder-success-url'
+    NATURALTIME = 'jutut-placeholder-naturaltime-'
+    NATURALTIME_RE = re.compile(re.escape(NATURALTIME) + r'(\d+)')
+
+    # pylint: disable-next=arguments-differ too-many-arguments too-many-positional-arguments
+    def get_suffix(self, conversation_id, version, course_version, object_versions, language, extra):
+        # extra contains view state, which affects the rendering (e.g. active feedbacks)
+        extra = sha1(repr(extra).encode('utf-8')).hexdigest()
+        return '-'.join((str(conversation_id), version, course_version, *object_versions, language or '', extra))
+
+    def set(self, key, html):
+        cache.set(key, html, self.timeout)
+
+    def render(self, html, csrf_token, success_url):
+        html = (html
+            .replace(self.CSRF_TOKEN, escape(csrf_token))
+            .replace(self.SUCCESS_URL, escape(success_url))
+        )
+        return self.NATURALTIME_RE.sub(
+            lambda m: escape(naturaltime(datetime.fromtimestamp(int(m.group(1)), timezone.utc))),
+            html,
+        )
+
+
+CachedConversationHtml = CachedConversationHtml(timeout=app_settings.CONVERSATION_CACHE_TIMEOUT)
+
+
 class MiscCache:
     """Cache for storing miscellaneous content related to a course."""
     def __init__(self, prefix=None, timeout=None) -> None:
@@ -159,14 +580,15 @@ class MiscCache:
     def get_suffix(self, *args) -> str:
         return '-'.join(str(x) for x in args)
 
+    def get_key(self, key: str, course: Course) -> str:
+        return '/'.join((self.prefix, self.get_suffix(key, course.id)))
+
     def get(self, key: str, course: Course) -> object:
-        full_key = '/'.join((self.prefix, self.get_suffix(key, course.id)))
-        return cache.get(full_key)
+        return cache.get(self.get_key(key, course))
 
     def set(self, key: str, course: Course, value, timeout=-1) -> None:
-        full_key = '/'.join((self.prefix, self.get_suffix(key, course.id)))
         timeout = timeout if (timeout != -1) else self.timeout
-        cache.set(full_key, value, timeout)
+        cache.set(self.get_key(key, course), value, timeout)
 
 
 class BackgroundCache(MiscCache):
@@ -189,12 +611,14 @@ class BackgroundCache(MiscCache):
             self.set('questionnaires', course, bgq_dict)
         return bgq_dict
 
-    def get_response(self, student: Student, course: Course) -> Optional[tuple[int, dict]]:
-        full_key = '/'.join((
+    def get_response_key(self, student: Student, course: Course) -> str:
+        return '/'.join((
             self.prefix,
             self.get_suffix(student.id, course.id, 'response'),
         ))
-        return cache.get(full_key)
+
+    def get_response(self, student: Student, course: Course) -> Optional[tuple[int, dict]]:
+        return cache.get(self.get_response_key(student, course))
 
     def get_or_set_response(self,
             student: Student,
@@ -212,11 +636,7 @@ class BackgroundCache(MiscCache):
                     student, client, bg_questionnaires
                 )
             # set value in cache
-            full_key = '/'.join((
-                self.prefix,
-                self.get_suffix(student.id, course.id, 'response'),
-            ))
-            cache.set(full_key, response)
+            cache.set(self.get_response_key(student, course), response)
         return response
 
 
@@ -6,10 +6,14 @@ from django.db import models
 import django_filters
 from django import forms
 from django.core.exceptions import ValidationError
-from django.utils.translation import gettext_lazy as _
+from django.urls import reverse
+from django.utils.translation import get_language, gettext_lazy as _
 
 from django_colortag.filters import ColortagIEAndOrFilter
 
+from lib.helpers import pick_localized
+
+from .cached import CachedFilterChoices
 from .models import (
     Student,
     StudentTag,
@@ -145,6 +149,45 @@ class SegmentedSelect(forms.RadioSelect):
             attrs["class"] += " " + add_classes
         super().__init__(attrs, choices)
 
+class AutocompleteSelect(forms.Select):
+    """
+    Select for model choices, which are too many to be listed. Only the
+    selected option is rendered and other options are searched by the
+    script (see filterbar.js) from the url, which returns JSON
+    {"results": [{"id": ..., "text": ...}]}.
+    """
+    url = None
+
+    def __init__(self, attrs=None, url=None):
+        attrs = dict(attrs or {})
+        attrs['class'] = ' '.join(filter(None, (attrs.get('class'), 'autocomplete-select')))
+        super().__init__(attrs)
+        if url is not None:
+            self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        if self.url:
+            context['widget']['attrs']['data-url'] = self.url
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        # query only the selected objects instead of all choices
+        field = self.choices.field
+        choices = [('', field.empty_label or '')]
+        selected = [v for v in value if v and str(v).isdigit()]
+        if selected:
+            choices.extend(
+                (field.prepare_value(obj), field.label_from_instance(obj))
+                for obj in field.queryset.filter(pk__in=selected)
+            )
+        all_choices, self.choices = self.choices, choices
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
 class FlagWidget(forms.MultiWidget):
     template_name = "feedback/widgets/flag_multiwidget.html"
 
@@ -283,6 +326,8 @@ class ComboTextSearchFilter(django_filters.CharFilter):
     By default, the filter uses the filter_text method of the queryset.
     However, if the checkbox is selected, uses alternative method for
     searching (which is by default case-insensitive regex search).
+    Regex searches are indexed only if migration 0029 could install the
+    pg_trgm extension, check_feedback_indexes command tells if they are.
     """
     field_class = ComboTextSearchField
 
@@ -295,8 +340,7 @@ class ComboTextSearchFilter(django_filters.CharFilter):
         text_val, cb_val = value
         if text_val:
             if cb_val: # checkbox selected, use alternative search method
-                lookup = "%s__%s" % (self.field_name, self.lookup_expr)
-                return qs.filter(**{lookup: text_val})
+                return qs.filter_regex(self.field_name, text_val, self.lookup_expr)
             # use our default method
             return qs.filter_text(self.field_name, text_val)
         return qs
@@ -367,6 +411,21 @@ class FeedbackFilter(django_filters.FilterSet):
             ('-exercise', _('Reverse exercise order')),
     )
     ORDER_BY_DEFAULT = '-timestamp'
+    # unique orderings for the cursor pagination
+    CURSOR_ORDERINGS = {
+        'timestamp': ('timestamp', 'id'),
+        '-timestamp': ('-timestamp', '-id'),
+        'exercise': ('exercise__consecutive_order', 'exercise_id', 'id'),
+        '-exercise': ('-exercise__consecutive_order', '-exercise_id', '-id'),
+    }
+    # conversation orderings for the conversation pagination,
+    # feedback_timestamp is the newest or the oldest matching feedback
+    CONVERSATION_ORDERINGS = {
+        'timestamp': ('feedback_timestamp', 'id'),
+        '-timestamp': ('-feedback_timestamp', '-id'),
+        'exercise': ('exercise__consecutive_order', 'exercise_id', 'id'),
+        '-exercise': ('-exercise__consecutive_order', '-exercise_id', '-id'),
+    }
 
     response_grade = MultipleChoiceFilter(choices=Feedback.GRADE_CHOICES,
                                           extra_filter=lambda q: q.exclude(response_time=None),
@@ -382,7 +441,7 @@ class FeedbackFilter(django_filters.FilterSet):
         field_name='student__tags', label=_("Student tags"),
     )
     exercise = django_filters.ModelChoiceFilter(queryset=Exercise.objects.none())
-    student = django_filters.ModelChoiceFilter(queryset=Student.objects.none())
+    student = django_filters.ModelChoiceFilter(queryset=Student.objects.none(), widget=AutocompleteSelect)
     timestamp = DateTimeFromToRangeFilter(label=_("Timestamp"))
     path_key = django_filters.CharFilter(
         lookup_expr='iregex',
@@ -398,9 +457,8 @@ class FeedbackFilter(django_filters.FilterSet):
         field_name='form_data',
         label=_("Student content"),
         help_text=_(
-            "Filter conversations based on content of the student "
-            "feedback responses. Unfortunately this includes the field "
-            "names as well as non-textual responses. "
+            "Filter conversations based on the text answers of the student "
+            "feedback responses. The search matches words starting with the search terms. "
             "The operators 'AND', 'OR' and 'NOT' (case-sensitive) are supported. "
             "Otherwise the search is case-insensitive."
         ),
@@ -415,6 +473,7 @@ class FeedbackFilter(django_filters.FilterSet):
         label=_("Teacher content"),
         help_text=_(
             "Filter conversations based on text in the teacher responses. "
+            "The search matches words starting with the search terms. "
             "The operators 'AND', 'OR' and 'NOT' (case-sensitive) are supported. "
             "Otherwise the search is case-insensitive."
         ),
@@ -476,9 +535,22 @@ class FeedbackFilter(django_filters.FilterSet):
             return self._form
         form = super().form
         course = self._course
-        form.fields['exercise'].queryset = Exercise.objects.filter(course=course).all()
-        form.fields['student'].queryset = Student.objects.get_students_on_course(course)
-        form.fields['response_by'].queryset = course.staff.exclude(is_staff=True)
+        # querysets are used only to validate the selected values,
+        # options are rendered from the cached choices
+        choices = CachedFilterChoices.get(course)
+        language = get_language()
+        exercise = form.fields['exercise']
+        exercise.queryset = Exercise.objects.filter(course=course).all()
+        exercise.widget.choices = [('', exercise.empty_label)] + [
+            (pk, pick_localized(name, language)) for pk, name in choices['exercises']
+        ]
+        response_by = form.fields['response_by']
+        response_by.queryset = course.staff.exclude(is_staff=True)
+        response_by.widget.choices = [('', response_by.empty_label)] + choices['staff']
+        student = form.fields['student']
+        # validation accepts only the students, which the search can return
+        student.queryset = Student.objects.with_feedback_on_course(course)
+        student.widget.url = reverse('feedback:student-search', kwargs={'course_id': course.id})
         feedbacktags = FeedbackTag.objects.filter(course=course).all()
         form.fields['tags'].set_queryset(feedbacktags)
         studenttags = StudentTag.objects.filter(course=course).all()
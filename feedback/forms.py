@@ -113,7 +113,7 @@ class ResponseForm(forms.ModelForm):
         data_changed_check = self.cleaned_data['data_changed_check']
         if data_changed_check != self.initial['data_changed_check']:
             self.has_expired = True
-            url = reverse('feedback:list', kwargs={'course_id': self.instance.exercise.course.id})
+            url = reverse('feedback:list', kwargs={'course_id': self.instance.course_id})
             url += '?' + urlencode({'student': self.instance.student.id, 'exercise': self.instance.exercise.id})
             link = '<a href="{url}" target="_blank" class="alert-link">{link_text}</a>'.format(
                 url=url,
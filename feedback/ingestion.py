@@ -0,0 +1,133 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousOperation
+from django.db import transaction
+from django.utils import translation
+
+from aplus_client.client import AplusGraderClient
+
+from .models import (
+    Exercise,
+    Student,
+    Feedback,
+    FeedbackInbox,
+)
+
+
+logger = logging.getLogger('jutut.feedback.ingestion')
+
+
+class SuspiciousStudent(SuspiciousOperation):
+    pass
+
+
+class IngestionError(Exception):
+    pass
+
+
+def resolve_exercise(grading_data):
+    """
+    Returns the Jutut exercise for the grading data. Exercise is created,
+    if it doesn't exist yet. Returns None, if the exercise can't be resolved.
+    """
+    exercise_obj = grading_data.exercise
+    if not exercise_obj:
+        return None
+    # Fetch the Jutut exercise based on the API ID (exercise ID in the A+ database).
+    # If it does not exist yet, the exercise is created in the Jutut database.
+    # When the exercise is created, the other fields are filled in with
+    # the data from exercise_obj.
+    exercise, _created = Exercise.objects.get_or_create(
+        exercise_obj,
+        select_related=('course', 'course__namespace'),
+    )
+    # Change the display name to the hierarchical name that always contains
+    # the module and chapter numbers.
+    hierarchical_name = exercise_obj._data.get('hierarchical_name')
+    if hierarchical_name and hierarchical_name != exercise.display_name:
+        exercise.display_name = hierarchical_name
+        exercise.save()
+    return exercise
+
+
+def resolve_student(grading_data, namespace, uid=None):
+    """
+    Returns the student using uid, if given, and otherwise the submitters
+    of the grading data. Raises SuspiciousStudent, if it can't be resolved.
+    """
+    student = None
+
+    if uid:
+        try:
+            student = Student.objects.get_by_api_id(uid, namespace=namespace)
+        except (Student.DoesNotExist, ValueError):
+            pass
+
+    # Fallback to resolve student from grading_data
+    if not student:
+        students = grading_data.submitters
+        if not students:
+            raise SuspiciousStudent("Failed to resolve students")
+        if len(students) != 1:
+            raise SuspiciousStudent("Multiple students in submission. Feedback expects only one")
+        student, _created = Student.objects.get_new_or_updated(students[0], namespace=namespace)
+
+    return student
+
+
+def get_grading_fields(grading_data):
+    """Returns feedback fields, which are resolved from the grading data"""
+    return {
+        'submission_html_url': grading_data.html_url,
+        'timestamp': grading_data.submission_time,
+        'response_seen': grading_data.feedback_response_seen,
+    }
+
+
+def store_feedback(exercise, submission_id, path_key, data, create_data=None):
+    """
+    Updates the feedback of the submission, if it exists (aplus resend action
+    for example), or creates a new version, which supersedes the older ones.
+    Values in create_data are used only for new feedback.
+
+    Returns tuple (feedback, created).
+    """
+    return Feedback.create_or_update_version(exercise, submission_id, path_key, data, create_data)
+
+
+def process_inbox_item(item):
+    """
+    Stores the submission in the FeedbackInbox row as a Feedback.
+    Grading data is loaded from A+ using the stored submission_url. Only
+    storing the feedback and deleting the row is done in a transaction.
+
+    Returns tuple (feedback, created).
+    """
+    client = AplusGraderClient(item.submission_url, shared_cache=cache, debug_enabled=settings.DEBUG)
+    gd = client.grading_data
+
+    exercise = resolve_exercise(gd)
+    if not exercise:
+        raise IngestionError("exercise not resolved from submission_url '%s'" % (item.submission_url,))
+    student = resolve_student(gd, exercise.namespace, item.student_uid)
+
+    data = {
+        'student': student,
+        'form': item.form,
+        'form_data': item.form_data,
+        'max_grade': item.max_grade,
+        'post_url': item.post_url,
+        'submission_url': item.submission_url,
+        **get_grading_fields(gd),
+    }
+    create_data = {
+        'language': item.language,
+        'response_grade': item.response_grade,
+        'response_time': item.response_time,
+    }
+    with translation.override(item.language), transaction.atomic():
+        result = store_feedback(exercise, gd.submission_id, item.path_key, data, create_data)
+        FeedbackInbox.objects.filter(id=item.id).delete()
+    return result
@@ -69,7 +69,7 @@ def get_feedback_queryset(command,
     # multiple
     courses = get_courses(command, site_domain, course_code, True)
     if courses:
-        feedbacks = feedbacks.filter(exercise__course__in=courses)
+        feedbacks = feedbacks.filter(course__in=courses)
     feedbacks_c = feedbacks.count()
 
     if not courses and not feedbacks_c:
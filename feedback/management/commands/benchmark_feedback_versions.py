@@ -0,0 +1,92 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ...models import (
+    Site,
+    Course,
+    Exercise,
+    Student,
+    Feedback,
+)
+
+
+class Command(BaseCommand):
+    help = ("Measure database queries per stored feedback submission. "
+            "Synthetic data is created in a transaction, which is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--count',
+                            type=int, default=50,
+                            help="Number of submissions per measured path")
+        parser.add_argument('--students',
+                            type=int, default=5,
+                            help="Number of synthetic students, submissions are divided between them")
+
+    def handle(self, *args, **options):
+        paths = [('orm', Feedback._upsert_version_orm)]
+        if connection.vendor == 'postgresql':
+            paths.append(('postgresql', Feedback._upsert_version_pg))
+        else:
+            self.stdout.write(self.style.NOTICE(
+                "Database is not PostgreSQL, measuring only the ORM path"))
+
+        with transaction.atomic():
+            for i, (name, upsert) in enumerate(paths):
+                exercise, students = self.create_objects(i, options['students'])
+                new = self.measure(upsert, exercise, students, options['count'])
+                resend = self.measure(upsert, exercise, students, options['count'])
+                self.stdout.write(self.style.SUCCESS(
+                    "{:12s} new: {:.2f} queries, {:.2f} ms / submission; "
+                    "resend: {:.2f} queries, {:.2f} ms / submission".format(
+                        name, *new, *resend)))
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def create_objects(index, num_students):
+        site = Site.objects.create(domain='benchmark-{}.invalid'.format(index))
+        url = 'https://{}/api/v2/'.format(site.domain)
+        course = Course.objects.create(
+            namespace=site, api_id=1, url=url + 'courses/1/',
+            code='BENCH', name='Benchmark', instance_name='bench',
+            html_url='https://{}/bench/'.format(site.domain), language='en',
+        )
+        exercise = Exercise.objects.create(
+            course=course, api_id=1, url=url + 'exercises/1/',
+            name='Feedback', display_name='1.1 Feedback',
+            html_url=course.html_url + 'm1/c1/feedback/',
+        )
+        students = [
+            Student.objects.create(
+                namespace=site, api_id=i, url=url + 'users/{}/'.format(i),
+                username='student{}'.format(i), full_name='Student {}'.format(i),
+            )
+            for i in range(num_students)
+        ]
+        return exercise, students
+
+    @staticmethod
+    def measure(upsert, exercise, students, count):
+        start = timezone.now() - timedelta(days=1)
+        queries = 0
+        elapsed = 0.0
+        for i in range(count):
+            data = {
+                'student': students[i % len(students)],
+                'form_data': {'feedback': 'Benchmark feedback {}'.format(i)},
+                'max_grade': Feedback.MAX_GRADE,
+                'post_url': 'https://jutut.invalid/feedback/bench',
+                'submission_url': 'https://aplus.invalid/api/v2/submissions/{}/grader/'.format(i),
+                'submission_html_url': 'https://aplus.invalid/submissions/{}/'.format(i),
+                'timestamp': start + timedelta(seconds=i),
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                upsert(exercise, i, 'bench', data, {})
+                elapsed += time.perf_counter() - t0
+            queries += len(ctx.captured_queries)
+        return queries / count, elapsed * 1000 / count
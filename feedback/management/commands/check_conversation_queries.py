@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ...models import (
+    Site,
+    Course,
+    Exercise,
+    Student,
+    StudentTag,
+    Feedback,
+    FeedbackTag,
+)
+from ...views import prefetch_conversations
+
+
+class Command(BaseCommand):
+    help = ("Check that prefetch_conversations loads the conversations of a "
+            "feedback list with the same number of queries for any number of "
+            "conversations. Synthetic data is created in a transaction, which "
+            "is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--count',
+                            type=int, default=20,
+                            help="Number of conversations in the larger measured list")
+        parser.add_argument('--versions',
+                            type=int, default=2,
+                            help="Number of feedback versions per conversation")
+
+    def handle(self, *args, **options):
+        count = max(2, options['count'])
+        with transaction.atomic():
+            course = self.create_objects(count, max(1, options['versions']))
+            feedbacks = list(
+                Feedback.objects
+                .filter(course=course, superseded_by=None)
+                .order_by('-timestamp')
+            )
+            results = [(n, self.measure(feedbacks[:n], course)) for n in (1, count)]
+            transaction.set_rollback(True)
+
+        for n, queries in results:
+            self.stdout.write("{:4d} conversations: {} queries".format(n, queries))
+        if len(set(queries for _n, queries in results)) != 1:
+            raise CommandError("Number of queries depends on the number of conversations")
+        self.stdout.write(self.style.SUCCESS("Number of queries is constant"))
+
+    @staticmethod
+    def create_objects(count, versions):
+        site = Site.objects.create(domain='querycheck.invalid')
+        url = 'https://{}/api/v2/'.format(site.domain)
+        course = Course.objects.create(
+            namespace=site, api_id=1, url=url + 'courses/1/',
+            code='CHECK', name='Query check', instance_name='check',
+            html_url='https://{}/check/'.format(site.domain), language='en',
+        )
+        exercise = Exercise.objects.create(
+            course=course, api_id=1, url=url + 'exercises/1/',
+            name='Feedback', display_name='1.1 Feedback',
+            html_url=course.html_url + 'm1/c1/feedback/',
+        )
+        conversation_tag = FeedbackTag.objects.create(course=course, name='check', slug='check')
+        student_tag = StudentTag.objects.create(
+            namespace=site, api_id=1, url=url + 'courses/1/usertags/1/',
+            course=course, name='check', slug='check',
+        )
+        start = timezone.now() - timedelta(days=1)
+        for i in range(count):
+            student = Student.objects.create(
+                namespace=site, api_id=i, url=url + 'users/{}/'.format(i),
+                username='student{}'.format(i), full_name='Student {}'.format(i),
+            )
+            student.tags.add(student_tag)
+            for v in range(versions):
+                submission_id = i * versions + v
+                data = {
+                    'student': student,
+                    'form_data': {'feedback': 'Feedback {} version {}'.format(i, v)},
+                    'max_grade': Feedback.MAX_GRADE,
+                    'post_url': 'https://jutut.invalid/feedback/check',
+                    'submission_url': url + 'submissions/{}/grader/'.format(submission_id),
+                    'submission_html_url': course.html_url + 'submissions/{}/'.format(submission_id),
+                    'timestamp': start + timedelta(seconds=submission_id),
+                }
+                feedback, _created = Feedback.create_or_update_version(
+                    exercise, submission_id, 'check', data)
+            conversation_tag.conversations.add(feedback.conversation_id)
+        return course
+
+    @staticmethod
+    def measure(feedbacks, course):
+        # access the same relations as the feedback list views
+        with CaptureQueriesContext(connection) as ctx:
+            for conversation in prefetch_conversations(feedbacks, course):
+                str(conversation.student)
+                str(conversation.exercise)
+                list(conversation.tags.all())
+                list(conversation.student.course_tags)
+                for feedback in conversation.feedbacks.all():
+                    str(feedback.exercise)
+                    str(feedback.student)
+                    str(feedback.response_by)
+        return len(ctx.captured_queries)
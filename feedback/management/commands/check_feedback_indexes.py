@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from lib.postgres import get_extension_version
+
+from ...models import Course, Exercise, Feedback, FeedbackQuerySet
+
+
+class Command(BaseCommand):
+    help = ("Check with EXPLAIN that the flag filter queries use the partial "
+            "indexes of Feedback, and the regex filters the trigram indexes, "
+            "when pg_trgm is installed. Sequential scans are disabled for the "
+            "check, so the result doesn't depend on the size of the tables.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('-c', '--course',
+                            type=int, default=None,
+                            help="Id of the course used in the queries (default: the first course)")
+
+    def get_checks(self, course_id, exercise_id):
+        feedbacks = Feedback.objects
+        return [
+            # CachedNotrespondedCount
+            ("not responded count", 'feedback_course_unread_newest',
+             feedbacks.get_notresponded(course_id=course_id).order_by()),
+            # ManageNotRespondedListView
+            ("not responded list", 'feedback_course_unread_newest',
+             feedbacks.get_notresponded(course_id=course_id)[:50]),
+            ("not responded list of exercise", 'feedback_unread_newest',
+             feedbacks.get_notresponded(exercise_id=exercise_id)[:50]),
+            # schedule_failed
+            ("missed uploads", 'feedback_upload_missed',
+             feedbacks.filter_missed_upload(time_gap_min=60)[:100]),
+            ("failed uploads", 'feedback_upload_error',
+             feedbacks.filter_failed_upload(max_tries=50, time_gap_min=9*60)[:100]),
+            # retry_failed_uploads
+            ("upload error flag", 'feedback_upload_error',
+             feedbacks.filter_flags(FeedbackQuerySet.UPLOAD_FLAG.UPL_ERROR).order_by('_response_upl_at')),
+        ]
+
+    def get_regex_checks(self):
+        # ComboTextSearchFilter and the path_key filter, without other
+        # filters, which could be done with other indexes
+        feedbacks = Feedback.objects.all()
+        return [
+            ("regex search of path_key", 'feedback_path_key_trgm',
+             feedbacks.filter(path_key__iregex='feedback')),
+            ("regex search of response_msg", 'feedback_response_msg_trgm',
+             feedbacks.filter_regex('response_msg', 'thank')),
+            ("regex search of form_data", 'feedback_form_data_trgm',
+             feedbacks.filter_regex('form_data', 'thank')),
+        ]
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Index check requires PostgreSQL")
+
+        course_id = options['course']
+        if course_id is None:
+            course = Course.objects.order_by('id').first()
+            course_id = course.id if course else 0
+        exercise = Exercise.objects.filter(course_id=course_id).order_by('id').first()
+        exercise_id = exercise.id if exercise else 0
+
+        checks = self.get_checks(course_id, exercise_id)
+        if get_extension_version(connection, 'pg_trgm')[1]:
+            checks += self.get_regex_checks()
+        else:
+            self.stdout.write(self.style.NOTICE("pg_trgm is not installed, regex filters are not checked"))
+
+        failed = 0
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, index, queryset in checks:
+                plan = queryset.explain()
+                if index in plan:
+                    self.stdout.write(self.style.SUCCESS("{}: uses {}".format(name, index)))
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR("{}: doesn't use {}".format(name, index)))
+                if options['verbosity'] > 1 or index not in plan:
+                    self.stdout.write(plan)
+
+        if failed:
+            raise CommandError("{} queries don't use the expected index".format(failed))
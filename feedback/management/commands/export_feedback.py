@@ -11,7 +11,7 @@ from feedback.models import Course, Feedback, Student
 class FeedbackStream(list):
 
     def __init__(self, course, only_text=False):
-        self.all = Feedback.objects.filter(exercise__course=course)
+        self.all = Feedback.objects.filter(course=course)
         self.iterated = 0
         self._only_text = only_text
 
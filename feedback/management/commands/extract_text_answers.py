@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+
+from ..command_utils import get_feedback_queryset
+from ...models import Feedback, FeedbackForm
+
+class Command(BaseCommand):
+    help = 'Extract text answers of feedbacks into the text_answers column'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-f', '--feedback',
+                            type=int, default=None,
+                            help="Extract single feedback (use id)")
+        parser.add_argument('-s', '--site',
+                            help="Domain of aplus site or 'all'")
+        parser.add_argument('-c', '--course',
+                            help="If there is more than one course, "
+                            "give code of the course you are processing or 'all'")
+        parser.add_argument('--force',
+                            action='store_true',
+                            help="Extract also feedbacks, which already have text answers")
+        parser.add_argument('--batch-size',
+                            type=int, default=1000,
+                            help="How many feedbacks are updated in a single query")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        feedbacks, _feedbacks_count = get_feedback_queryset(
+            self,
+            options['feedback'],
+            options['site'],
+            options['course'],
+        )
+        if not options['force']:
+            feedbacks = feedbacks.filter(text_answers=None)
+        feedbacks = ( feedbacks
+            .order_by('id')
+            .select_related(None)
+            .only('id', 'form_id', 'form_data')
+        )
+
+        feedbacks_count = feedbacks.count()
+        if feedbacks_count == 0:
+            self.stdout.write(self.style.SUCCESS("No feedbacks to update"))
+            return
+        self.stdout.write(self.style.SUCCESS("Going to extract text answers of {} feedbacks.".format(feedbacks_count)))
+
+        # forms are shared by the feedbacks, so the form classes are built once
+        forms = {}
+        last_id = 0
+        done = 0
+        while True:
+            batch = list(feedbacks.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            missing = {fb.form_id for fb in batch if fb.form_id is not None} - forms.keys()
+            if missing:
+                forms.update(FeedbackForm.objects.in_bulk(missing))
+            for fb in batch:
+                fb.text_answers = Feedback.extract_text_answers(forms.get(fb.form_id), fb.form_data)
+            Feedback.objects.bulk_update(batch, ['text_answers'])
+            last_id = batch[-1].id
+            done += len(batch)
+            self.stdout.write(self.style.NOTICE("  {} / {}".format(done, feedbacks_count)))
+
+        self.stdout.write(self.style.SUCCESS("Extracted text answers of {} feedbacks.".format(done)))
@@ -0,0 +1,240 @@
+import json
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from urllib.parse import urlencode, urljoin
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from aplus_client.debugging import AplusClientDebugging, TEST_URL_PREFIX
+
+from ...models import (
+    Site,
+    Course,
+    Exercise,
+    Student,
+    Conversation,
+    Feedback,
+)
+from ...views import FeedbackSubmissionView
+
+
+# Synthetic api objects use ids from this range, so they don't mix with the test_api fixtures
+ID_BASE = 91000000
+
+
+class Command(BaseCommand):
+    help = ("Load test the A+ grader endpoint (/feedback/<path_key>) with synthetic "
+            "students and exercises. A+ api is emulated with generated test_api fixtures. "
+            "DEBUG is not changed, so with DEBUG off the form page cache is used as in production.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--requests',
+                            type=int, default=200,
+                            help="Number of requests per method")
+        parser.add_argument('-c', '--concurrency',
+                            type=int, default=4,
+                            help="Number of concurrent clients")
+        parser.add_argument('--students',
+                            type=int, default=50,
+                            help="Number of synthetic students")
+        parser.add_argument('--exercises',
+                            type=int, default=10,
+                            help="Number of synthetic exercises")
+        parser.add_argument('-m', '--method',
+                            choices=('get', 'post', 'both'), default='both',
+                            help="Request methods to test")
+        parser.add_argument('--no-cleanup',
+                            action='store_false', dest='cleanup',
+                            help="Keep synthetic course, students and feedbacks afterwards")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError("At least two requests are required")
+        methods = ('get', 'post') if options['method'] == 'both' else (options['method'],)
+
+        fixture_path = tempfile.mkdtemp(prefix='jutut-loadtest-')
+        old_path = AplusClientDebugging.TEST_DATA_PATH
+        AplusClientDebugging.TEST_DATA_PATH = fixture_path
+        FeedbackSubmissionView.test_api_enabled = True
+        try:
+            self.create_fixtures(fixture_path, options['students'], options['exercises'], options['requests'])
+            for method in methods:
+                stats = self.run(method, options)
+                self.print_stats(method, stats)
+        finally:
+            FeedbackSubmissionView.test_api_enabled = False
+            AplusClientDebugging.TEST_DATA_PATH = old_path
+            shutil.rmtree(fixture_path, ignore_errors=True)
+            if options['cleanup']:
+                self.cleanup()
+
+    @staticmethod
+    def write(fixture_path, name, data):
+        with open(path.join(fixture_path, name + '.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    def create_fixtures(self, fixture_path, num_students, num_exercises, num_submissions):
+        with open(path.join(AplusClientDebugging.TEST_DATA_PATH, 'exercises__1.json'), encoding='utf-8') as f:
+            exercise_info = json.load(f)['exercise_info']
+        def api(*parts):
+            return urljoin(TEST_URL_PREFIX, '/'.join(str(p) for p in parts) + '/')
+
+        course = {'id': ID_BASE, 'url': api('courses', ID_BASE)}
+        self.write(fixture_path, 'courses__%d' % ID_BASE, dict(course,
+            code='LOADTEST',
+            name='Load test course',
+            html_url='#aplus_course_%d' % ID_BASE,
+            instance_name='Load test',
+            starting_time='1970-01-01T00:00:01Z',
+            ending_time='2070-01-01T00:00:01Z',
+            visible_to_students=True,
+        ))
+
+        for i in range(num_exercises):
+            eid = ID_BASE + i
+            exercise = {'id': eid, 'url': api('exercises', eid)}
+            self.write(fixture_path, 'exercises__%d' % eid, dict(exercise,
+                display_name='%d. Load test exercise' % (i + 1),
+                html_url='#aplus_exercise_%d' % eid,
+                name='Load test exercise %d' % (i + 1),
+                course=course,
+                is_submittable=True,
+                max_points=2,
+                max_submissions=0,
+                exercise_info=exercise_info,
+            ))
+            self.write(fixture_path, 'exercises__%d__grader' % eid, {
+                'url': api('exercises', eid, 'grader'),
+                'exercise': exercise,
+            })
+
+        for i in range(num_students):
+            uid = ID_BASE + i
+            self.write(fixture_path, 'users__%d' % uid, {
+                'id': uid,
+                'url': api('users', uid),
+                'username': 'loadtest%d' % i,
+                'student_id': '%dX' % i,
+                'full_name': 'Load Test %d' % i,
+                'first_name': 'Load',
+                'last_name': 'Test %d' % i,
+                'email': 'loadtest%d@example.com' % i,
+            })
+
+        for i in range(num_submissions):
+            sid = ID_BASE + i
+            submission = {
+                'id': sid,
+                'url': api('submissions', sid),
+                'submission_time': '2016-08-17T14:19:04.539221Z',
+                'html_url': '#aplus_submission%d' % sid,
+            }
+            exercise = {'id': ID_BASE + i % num_exercises, 'url': api('exercises', ID_BASE + i % num_exercises)}
+            uid = ID_BASE + i % num_students
+            self.write(fixture_path, 'submissions__%d' % sid, dict(submission,
+                exercise=exercise,
+                submitters=[{'id': uid, 'url': api('users', uid)}],
+                status='waiting',
+                grade=0,
+                grading_time=None,
+            ))
+            self.write(fixture_path, 'submissions__%d__grader' % sid, {
+                'url': api('submissions', sid, 'grader'),
+                'submission': submission,
+                'exercise': exercise,
+                'grading_data': None,
+                'is_graded': False,
+            })
+
+    def get_requests(self, method, options):
+        num_exercises = options['exercises']
+        for i in range(options['requests']):
+            e = i % num_exercises
+            if method == 'get':
+                submission_url = urljoin(TEST_URL_PREFIX, 'exercises/%d/grader/' % (ID_BASE + e))
+            else:
+                submission_url = urljoin(TEST_URL_PREFIX, 'submissions/%d/grader/' % (ID_BASE + i))
+            params = {
+                'submission_url': submission_url,
+                'post_url': 'http://testserver/feedback/loadtest/ex%d?%s' % (
+                    e, urlencode({'submission_url': submission_url})),
+                'max_points': 2,
+                'lang': 'en',
+            }
+            url = reverse('feedback:submission', kwargs={'path_key': 'loadtest/ex%d' % e})
+            yield url + '?' + urlencode(params)
+
+    def run(self, method, options):
+        local = threading.local()
+        data = {
+            'timespent': 15,
+            'feedbackquestion': 'Load test feedback',
+        }
+
+        def do_request(url):
+            client = getattr(local, 'client', None)
+            if client is None:
+                local.client = client = Client(raise_request_exception=False)
+            queries = []
+            def count(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+            with connection.execute_wrapper(count):
+                t0 = time.perf_counter()
+                if method == 'get':
+                    response = client.get(url)
+                else:
+                    response = client.post(url, data)
+                elapsed = time.perf_counter() - t0
+            return elapsed, len(queries), response.status_code
+
+        urls = list(self.get_requests(method, options))
+        api_calls = AplusClientDebugging.request_count
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(do_request, urls))
+        total = time.perf_counter() - t0
+        api_calls = AplusClientDebugging.request_count - api_calls
+
+        latencies = [r[0] * 1000 for r in results]
+        percentiles = statistics.quantiles(latencies, n=100)
+        count = len(results)
+        return {
+            'requests': count,
+            'errors': sum(1 for r in results if r[2] != 200),
+            'rps': count / total,
+            'p50': percentiles[49],
+            'p95': percentiles[94],
+            'p99': percentiles[98],
+            'queries': sum(r[1] for r in results) / count,
+            'api_calls': api_calls / count,
+        }
+
+    def print_stats(self, method, stats):
+        style = self.style.SUCCESS if not stats['errors'] else self.style.NOTICE
+        self.stdout.write(style(
+            "{method:4s} {requests} requests, {errors} errors: {rps:.1f} req/s, "
+            "latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms, "
+            "{queries:.1f} queries / request, {api_calls:.2f} A+ calls / request"
+            .format(method=method.upper(), **stats)
+        ))
+
+    def cleanup(self):
+        site = Site.objects.filter(domain='testserver.testserver').first()
+        if not site:
+            return
+        courses = Course.objects.filter(namespace=site, api_id=ID_BASE)
+        Feedback.objects.filter(course__in=courses).delete()
+        Conversation.objects.filter(course__in=courses).delete()
+        Exercise.objects.filter(course__in=courses).delete()
+        Student.objects.filter(namespace=site, api_id__gte=ID_BASE, username__startswith='loadtest').delete()
+        courses.delete()
+        self.stdout.write(self.style.SUCCESS("Removed synthetic load test data"))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-17 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0026_alter_feedback_response_notify'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackInbox',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('path_key', models.CharField(max_length=255)),
+                ('form_data', models.JSONField(blank=True)),
+                ('max_grade', models.PositiveSmallIntegerField(default=2)),
+                ('post_url', models.URLField()),
+                ('submission_url', models.URLField()),
+                ('student_uid', models.IntegerField(null=True)),
+                ('language', models.CharField(max_length=255, null=True)),
+                ('response_grade', models.PositiveSmallIntegerField(null=True)),
+                ('response_time', models.DateTimeField(null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('form', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='feedback.feedbackform')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-17 14:02
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import lib.postgres
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0027_feedbackinbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(lib.postgres.JsonbToTsvector('form_data', config='simple'), name='feedback_student_text_search'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(lib.postgres.TextToTsvector('response_msg', config='simple'), name='feedback_teacher_text_search'),
+        ),
+    ]
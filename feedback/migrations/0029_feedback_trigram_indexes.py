@@ -0,0 +1,57 @@
+# Generated by Django 4.2.27 on 2026-10-17 14:40
+
+import logging
+
+from django.db import DatabaseError, migrations, transaction
+
+from lib.postgres import get_extension_version
+
+
+logger = logging.getLogger('feedback.migrations')
+
+# Trigram indexes speed up the regex filters (iregex) of the feedback list.
+# Expressions match the sql of the lookups, e.g. form_data__iregex is
+# "form_data"::text ~* pattern. Indexes are not part of the model state, as
+# they exist only when the pg_trgm extension can be installed.
+TRIGRAM_INDEXES = (
+    ('feedback_path_key_trgm', '"path_key"'),
+    ('feedback_response_msg_trgm', '"response_msg"'),
+    ('feedback_form_data_trgm', '("form_data"::text)'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    available, installed = get_extension_version(connection, 'pg_trgm')
+    if not available:
+        logger.warning("pg_trgm extension is not available, regex filters are not indexed")
+        return
+    if not installed:
+        try:
+            with transaction.atomic(using=connection.alias):
+                schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except DatabaseError as error:
+            logger.warning("pg_trgm extension could not be installed, regex filters are not indexed: %s", error)
+            return
+    table = schema_editor.quote_name(apps.get_model('feedback', 'Feedback')._meta.db_table)
+    for name, expression in TRIGRAM_INDEXES:
+        schema_editor.execute("CREATE INDEX IF NOT EXISTS %s ON %s USING gin (%s gin_trgm_ops)" % (
+            schema_editor.quote_name(name), table, expression))
+
+
+def drop_trigram_indexes(apps, schema_editor): # pylint: disable=unused-argument
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _expression in TRIGRAM_INDEXES:
+        schema_editor.execute("DROP INDEX IF EXISTS %s" % (schema_editor.quote_name(name),))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0028_feedback_text_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
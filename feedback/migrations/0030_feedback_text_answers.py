@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-17 16:41
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import lib.postgres
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0029_feedback_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='text_answers',
+            field=models.JSONField(editable=False, null=True),
+        ),
+        migrations.RemoveIndex(
+            model_name='feedback',
+            name='feedback_student_text_search',
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=django.contrib.postgres.indexes.GinIndex(lib.postgres.JsonbToTsvector(django.db.models.functions.comparison.Coalesce(lib.postgres.JsonbPathQueryArray('text_answers', path='$[*][1]'), 'form_data'), config='simple'), name='feedback_student_text_search'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-17 17:20
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0030_feedback_text_answers'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='text_pattern_ops'), name='student_username_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('full_name'), name='text_pattern_ops'), name='student_full_name_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('student_id'), name='text_pattern_ops'), name='student_student_id_prefix'),
+        ),
+    ]
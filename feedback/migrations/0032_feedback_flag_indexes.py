@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-17 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0031_student_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('response_time', None), ('superseded_by', None)), fields=['exercise', '-timestamp'], name='feedback_unread_newest'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(models.Q(('_response_upl_code', 200), _negated=True), models.Q(('_response_upl_code', 0), _negated=True)), fields=['_response_upl_at'], name='feedback_upload_error'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('_response_upl_code', 0), models.Q(('response_time', None), _negated=True)), fields=['_response_upl_at'], name='feedback_upload_missed'),
+        ),
+    ]
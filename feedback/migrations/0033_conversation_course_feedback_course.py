@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0032_feedback_flag_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='course',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='conversations', to='feedback.course'),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='course',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='feedbacks', to='feedback.course'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:36
+
+from django.db import migrations, models
+
+
+# Separate from the AddField and AlterField migrations: the foreign keys are
+# deferred in PostgreSQL, so the updated rows have pending trigger events,
+# which prevent altering the table in the same transaction.
+def fill_course_from_exercise(apps, schema_editor):
+    Exercise = apps.get_model("feedback", "Exercise")
+    course_id = models.Subquery(
+        Exercise.objects.filter(id=models.OuterRef('exercise_id')).values('course_id')[:1]
+    )
+    for model_name in ("Conversation", "Feedback"):
+        Model = apps.get_model("feedback", model_name)
+        Model.objects.filter(course=None).update(course_id=course_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0033_conversation_course_feedback_course'),
+    ]
+
+    operations = [
+        # Copy the course of the exercise to the existing rows
+        migrations.RunPython(fill_course_from_exercise, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.27 on 2026-10-17 18:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0034_fill_conversation_feedback_course'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversation',
+            name='course',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='conversations', to='feedback.course'),
+        ),
+        migrations.AlterField(
+            model_name='feedback',
+            name='course',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='feedbacks', to='feedback.course'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['course', '-timestamp'], name='feedback_course_timestamp'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(condition=models.Q(('response_time', None), ('superseded_by', None)), fields=['course', '-timestamp'], name='feedback_course_unread_newest'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.27 on 2026-10-17 19:12
+
+import logging
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+logger = logging.getLogger('feedback.migrations')
+
+
+# Counters of newest unread feedbacks (see NotrespondedCounter) are kept up
+# to date by a trigger. The trigger fires only, when the counted columns
+# change, so e.g. upload status updates don't touch the counters.
+COUNTER_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION feedback_notresponded_counter() RETURNS trigger AS $$
+DECLARE
+    old_counted boolean := false;
+    new_counted boolean := false;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        old_counted := OLD.superseded_by_id IS NULL AND OLD.response_time IS NULL;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        new_counted := NEW.superseded_by_id IS NULL AND NEW.response_time IS NULL;
+    END IF;
+    IF old_counted AND new_counted THEN
+        IF OLD.exercise_id = NEW.exercise_id THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF old_counted THEN
+        UPDATE {counter} SET count = count - 1 WHERE exercise_id = OLD.exercise_id;
+    END IF;
+    IF new_counted THEN
+        INSERT INTO {counter} (exercise_id, course_id, count)
+        VALUES (NEW.exercise_id, NEW.course_id, 1)
+        ON CONFLICT (exercise_id) DO UPDATE SET count = {counter}.count + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+COUNTER_TRIGGER_SQL = """
+CREATE TRIGGER feedback_notresponded_counter
+AFTER INSERT OR DELETE OR UPDATE OF superseded_by_id, response_time, exercise_id ON {feedback}
+FOR EACH ROW EXECUTE FUNCTION feedback_notresponded_counter()
+"""
+
+FILL_COUNTERS_SQL = """
+INSERT INTO {counter} (exercise_id, course_id, count)
+SELECT exercise_id, course_id, count(*)
+FROM {feedback}
+WHERE superseded_by_id IS NULL AND response_time IS NULL
+GROUP BY exercise_id, course_id
+"""
+
+
+def get_tables(apps, schema_editor):
+    return {
+        'counter': schema_editor.quote_name(apps.get_model('feedback', 'NotrespondedCounter')._meta.db_table),
+        'feedback': schema_editor.quote_name(apps.get_model('feedback', 'Feedback')._meta.db_table),
+    }
+
+
+def create_counter_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        logger.warning("Database is not PostgreSQL, not responded counts are not stored")
+        return
+    tables = get_tables(apps, schema_editor)
+    schema_editor.execute(COUNTER_FUNCTION_SQL.format(**tables), None)
+    schema_editor.execute(COUNTER_TRIGGER_SQL.format(**tables), None)
+    schema_editor.execute(FILL_COUNTERS_SQL.format(**tables), None)
+
+
+def drop_counter_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tables = get_tables(apps, schema_editor)
+    schema_editor.execute("DROP TRIGGER IF EXISTS feedback_notresponded_counter ON {feedback}".format(**tables), None)
+    schema_editor.execute("DROP FUNCTION IF EXISTS feedback_notresponded_counter()", None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0035_alter_conversation_course_feedback_course'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotrespondedCounter',
+            fields=[
+                ('exercise', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notresponded_counter', serialize=False, to='feedback.exercise')),
+                ('count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notresponded_counters', to='feedback.course')),
+            ],
+        ),
+        migrations.RunPython(create_counter_trigger, drop_counter_trigger),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0036_notrespondedcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedbackinbox',
+            name='claimed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-17 20:05
+
+from django.db import migrations
+
+from lib.postgres import get_extension_version
+
+
+# Regex filter of form_data matches only the text answers, see
+# REGEX_SEARCH_EXPRESSIONS in feedback.models. The trigram index of
+# migration 0029 is replaced with the same name, if pg_trgm is installed.
+INDEX_NAME = 'feedback_form_data_trgm'
+TEXT_ANSWERS_EXPRESSION = (
+    """(COALESCE(jsonb_path_query_array("text_answers", '$[*][1]'::jsonpath), "form_data")::text)"""
+)
+FORM_DATA_EXPRESSION = '("form_data"::text)'
+
+
+def replace_index(expression):
+    def replace(apps, schema_editor):
+        if not get_extension_version(schema_editor.connection, 'pg_trgm')[1]:
+            return
+        name = schema_editor.quote_name(INDEX_NAME)
+        table = schema_editor.quote_name(apps.get_model('feedback', 'Feedback')._meta.db_table)
+        schema_editor.execute("DROP INDEX IF EXISTS %s" % (name,))
+        schema_editor.execute("CREATE INDEX %s ON %s USING gin (%s gin_trgm_ops)" % (
+            name, table, expression))
+    return replace
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback', '0037_feedbackinbox_claimed'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            replace_index(TEXT_ANSWERS_EXPRESSION),
+            replace_index(FORM_DATA_EXPRESSION),
+        ),
+    ]
@@ -4,8 +4,14 @@ import re
 from collections import namedtuple
 from functools import reduce
 
-from django.db import models, transaction
+from django.core.exceptions import ValidationError
+from django.db import connection, models, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Coalesce, Upper
+from django.db.models.signals import post_save
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchQuery
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import get_language, gettext_lazy as _
@@ -15,6 +21,7 @@ from django_colortag.utils import use_white_font
 from r_django_essentials.fields import Enum
 
 from lib.helpers import pick_localized
+from lib.postgres import JsonbPathQueryArray, JsonbToTsvector, TextToTsvector, prefix_tsquery
 
 from aplus_client.django.models import ( # pylint: disable=unused-import
     ApiNamespace as Site, # mooc-jutut refers api namespaces as sites
@@ -28,6 +35,23 @@ from .templatetags.contexttag import render_context_tag
 
 Q = models.Q
 
+# Full text search of the feedback text filters. Words are not stemmed, as
+# the courses use different languages. The expressions are indexed (see
+# Feedback.Meta), so searches must use these same expressions.
+TEXT_SEARCH_CONFIG = 'simple'
+# text answers, or all strings in form_data if those are not extracted yet
+TEXT_ANSWER_VALUES = Coalesce(JsonbPathQueryArray('text_answers', path='$[*][1]'), 'form_data')
+TEXT_SEARCH_VECTORS = {
+    'form_data': JsonbToTsvector(TEXT_ANSWER_VALUES, config=TEXT_SEARCH_CONFIG),
+    'response_msg': TextToTsvector('response_msg', config=TEXT_SEARCH_CONFIG),
+}
+# Regex searches of the feedback text filters. These match the trigram
+# indexes created by the migrations (when pg_trgm is available), so field
+# names and keys of form_data are not matched.
+REGEX_SEARCH_EXPRESSIONS = {
+    'form_data': TEXT_ANSWER_VALUES,
+}
+
 
 class FeedbackForm(Form):
     class Meta:
@@ -42,19 +66,52 @@ class FeedbackForm(Form):
 class StudentManager(NamespacedApiObject.Manager):
     def get_students_on_course(self, course):
         return ( self.using_namespace_id(course.namespace_id)
-                 .filter(feedbacks__exercise__course=course)
+                 .filter(feedbacks__course=course)
                  .distinct()
                  .all() )
 
     def get_students_on_courses(self, courses):
         return ( self.all()
-                 .filter(feedbacks__exercise__course__in=courses)
+                 .filter(feedbacks__course__in=courses)
                  .distinct() )
 
+    def with_feedback_on_course(self, course):
+        """Students with feedback on the course, using EXISTS instead of a join and distinct"""
+        return ( self.using_namespace_id(course.namespace_id)
+                 .filter(Exists(Feedback.objects.filter(
+                     student=OuterRef('pk'),
+                     course=course,
+                 ))) )
+
+    def search_on_course(self, course, term):
+        """
+        Students with feedback on the course, whose username, full name or
+        student id starts with the term (case-insensitive). Prefixes are
+        searched using the indexes of Student.Meta.
+        """
+        return ( self.with_feedback_on_course(course)
+                 .filter(
+                     Q(username__istartswith=term) |
+                     Q(full_name__istartswith=term) |
+                     Q(student_id__istartswith=term)
+                 )
+                 .order_by('full_name', 'username', 'id') )
+
 
 class Student(NamespacedApiObject):
     objects = StudentManager()
 
+    class Meta(NamespacedApiObject.Meta):
+        # prefix searches of StudentManager.search_on_course
+        indexes = [
+            models.Index(OpClass(Upper('username'), name='text_pattern_ops'),
+                         name='student_username_prefix'),
+            models.Index(OpClass(Upper('full_name'), name='text_pattern_ops'),
+                         name='student_full_name_prefix'),
+            models.Index(OpClass(Upper('student_id'), name='text_pattern_ops'),
+                         name='student_student_id_prefix'),
+        ]
+
     username = models.CharField(max_length=128)
     full_name = models.CharField(max_length=128)
     student_id = models.CharField(max_length=25, null=True, blank=True)
@@ -269,6 +326,10 @@ class FeedbackQuerySet(models.QuerySet):
         Does not support quotes or parentheses to group search terms, treats
         each word (separated by whitespace) as a separate search term, joins
         search terms by default with 'AND'.
+
+        Fields in TEXT_SEARCH_VECTORS are searched with the full text search
+        index in PostgreSQL, where search terms match the beginning of words.
+        Other fields and databases use case-insensitive substring search.
         """
         parts = search.split()
         term_w_ops = []
@@ -292,19 +353,45 @@ class FeedbackQuerySet(models.QuerySet):
                     'op': False,
                 }
 
-        def term_dict_to_q(td):
-            # change term_w_ops dict to Q object
-            q_obj = Q(('%s__icontains' % name, td['word']))
-            if td['NOT']:
-                q_obj = ~q_obj
-            return q_obj
-        # reduce Q objects to a single Q object
+        if not term_w_ops:
+            return self
+
+        if name in TEXT_SEARCH_VECTORS and connection.vendor == 'postgresql':
+            def term_dict_to_q(td):
+                # change term_w_ops dict to tsquery
+                query = SearchQuery(prefix_tsquery(td['word']), config=TEXT_SEARCH_CONFIG, search_type='raw')
+                if td['NOT']:
+                    query = ~query
+                return query
+        else:
+            def term_dict_to_q(td):
+                # change term_w_ops dict to Q object
+                q_obj = Q(('%s__icontains' % name, td['word']))
+                if td['NOT']:
+                    q_obj = ~q_obj
+                return q_obj
+        # reduce Q objects (or tsqueries) to a single one
         res = term_dict_to_q(term_w_ops[0])
         for cur in term_w_ops[1:]:
             use_or = cur['op']
             q = term_dict_to_q(cur)
             res = (res | q) if use_or else (res & q)
-        return self.filter(res)
+        if isinstance(res, Q):
+            return self.filter(res)
+        alias = '%s_text_search' % name
+        return self.alias(**{alias: TEXT_SEARCH_VECTORS[name]}).filter(**{alias: res})
+
+    def filter_regex(self, name, pattern, lookup_expr='iregex'):
+        """Filter with a regex lookup of the field 'name'.
+
+        Fields in REGEX_SEARCH_EXPRESSIONS are matched against the expression
+        in PostgreSQL, e.g. only the text answers of form_data.
+        """
+        if name in REGEX_SEARCH_EXPRESSIONS and connection.vendor == 'postgresql':
+            alias = '%s_regex_search' % name
+            return self.alias(**{alias: REGEX_SEARCH_EXPRESSIONS[name]}).filter(
+                **{'%s__%s' % (alias, lookup_expr): pattern})
+        return self.filter(**{'%s__%s' % (name, lookup_expr): pattern})
 
     def filter_missed_upload(self, time_gap_min=15):
         gap = timezone.now() - datetime.timedelta(minutes=time_gap_min)
@@ -329,11 +416,11 @@ class FeedbackQuerySet(models.QuerySet):
                 'path_key',
             ).filter(
                 student=student,
-                exercise__course=course,
+                course=course,
             ).annotate(
                 count=models.Count('form_data'),
             ).order_by(
-                'exercise__course', 'exercise_id'
+                'course', 'exercise_id'
             )
         return q
 
@@ -345,7 +432,7 @@ class FeedbackQuerySet(models.QuerySet):
         if exercise_id is not None:
             qs = qs.filter(exercise__id=exercise_id)
         elif course_id is not None:
-            qs = qs.filter(exercise__course__id=course_id)
+            qs = qs.filter(course_id=course_id)
             if path_filter:
                 qs = qs.filter(path_key__startswith=path_filter)
         else:
@@ -369,6 +456,13 @@ class Conversation(models.Model):
         on_delete=models.PROTECT,
         verbose_name=_("Exercise"),
     )
+    # same as exercise.course, stored to avoid joins in course queries
+    course = models.ForeignKey(
+        Course,
+        related_name='conversations',
+        on_delete=models.PROTECT,
+        editable=False,
+    )
     student = models.ForeignKey(
         Student,
         related_name='conversations',
@@ -376,10 +470,6 @@ class Conversation(models.Model):
         verbose_name=_("Student"),
     )
 
-    @cached_property
-    def course(self):
-        return self.exercise.course
-
     def __str__(self):
         return 'All feedback by {} to {}'.format(
             self.student, self.exercise
@@ -392,6 +482,27 @@ class Feedback(models.Model):
         unique_together = [
             ('exercise', 'submission_id'),
         ]
+        indexes = [
+            GinIndex(TEXT_SEARCH_VECTORS['form_data'], name='feedback_student_text_search'),
+            GinIndex(TEXT_SEARCH_VECTORS['response_msg'], name='feedback_teacher_text_search'),
+            # partial indexes for the flag filters of FeedbackQuerySet,
+            # conditions must match the filters to be used by the queries
+            # (see the check_feedback_indexes command)
+            models.Index(fields=['course', '-timestamp'],
+                         name='feedback_course_timestamp'),
+            models.Index(fields=['exercise', '-timestamp'],
+                         condition=Q(superseded_by=None, response_time=None),
+                         name='feedback_unread_newest'),
+            models.Index(fields=['course', '-timestamp'],
+                         condition=Q(superseded_by=None, response_time=None),
+                         name='feedback_course_unread_newest'),
+            models.Index(fields=['_response_upl_at'],
+                         condition=~Q(_response_upl_code=200) & ~Q(_response_upl_code=0),
+                         name='feedback_upload_error'),
+            models.Index(fields=['_response_upl_at'],
+                         condition=Q(_response_upl_code=0) & ~Q(response_time=None),
+                         name='feedback_upload_missed'),
+        ]
 
     GRADES = Enum(
         ('NONE', -1, _('No response')), # can't be stored in db (positive integers only)
@@ -420,6 +531,13 @@ class Feedback(models.Model):
                                  related_name='feedbacks',
                                  on_delete=models.PROTECT,
                                  verbose_name=_("Exercise"))
+    # same as exercise.course, stored to avoid joins in course queries,
+    # indexed with timestamp in Meta.indexes
+    course = models.ForeignKey(Course,
+                               related_name='feedbacks',
+                               on_delete=models.PROTECT,
+                               db_index=False,
+                               editable=False)
     submission_id = models.IntegerField()
     path_key = models.CharField(max_length=255, db_index=True)
     max_grade = models.PositiveSmallIntegerField(default=MAX_GRADE)
@@ -442,6 +560,8 @@ class Feedback(models.Model):
                              on_delete=models.PROTECT,
                              null=True)
     form_data = models.JSONField(blank=True)
+    # values of the text fields in form_data, see Feedback.extract_text_answers
+    text_answers = models.JSONField(null=True, editable=False)
     superseded_by = models.ForeignKey('self',
                                       related_name="supersedes",
                                       on_delete=models.SET_NULL,
@@ -483,10 +603,6 @@ class Feedback(models.Model):
 
     # Extra getters and properties
 
-    @cached_property
-    def course(self):
-        return self.exercise.course
-
     @staticmethod
     def get_exercise_path(exercise, path_key):
         return "{}{}{}".format(
@@ -513,13 +629,25 @@ class Feedback(models.Model):
     def get_form_obj(self, dummy=False):
         return self.get_form_class(dummy)(data=self.form_data)
 
+    @staticmethod
+    def extract_text_answers(form, form_data):
+        """
+        Returns list of [key, text] pairs of the text fields in the form_data.
+        When the form is not valid, all values are returned.
+        """
+        form_class = form.form_class_or_dummy if form else None
+        if form_class is None or form_class.is_dummy_form:
+            return [[k, v] for k, v in form_data.items()]
+        return [[k, form_data[k]] for k in form_class.all_text_fields.keys() if k in form_data]
+
     @property
     def text_feedback(self):
-        form = self.get_form_obj(True)
-        if form.is_dummy_form:
-            return list(self.form_data.items())
-        data = self.form_data
-        return [(k, data[k]) for k in form.all_text_fields.keys()]
+        # text_answers is null for feedbacks not yet processed by the
+        # extract_text_answers command
+        answers = self.text_answers
+        if answers is None:
+            answers = self.extract_text_answers(self.form, self.form_data)
+        return [tuple(a) for a in answers]
 
     @property
     def response_uploaded(self):
@@ -613,13 +741,104 @@ class Feedback(models.Model):
         kwargs = {k: v for k,v in kwargs.items() if v is not None}
         student = kwargs['student']
         exercise = kwargs['exercise']
-        conv, _created = Conversation.objects.get_or_create(student=student, exercise=exercise)
+        conv, _created = Conversation.objects.get_or_create(
+            student=student,
+            exercise=exercise,
+            defaults={'course_id': exercise.course_id},
+        )
         kwargs['conversation'] = conv
+        kwargs['course_id'] = exercise.course_id
         new = cls.objects.create(**kwargs)
         assert new.pk is not None, "New feedback doesn't have primary key"
         new.supersede_older()
         return new
 
+    @classmethod
+    def create_or_update_version(cls, exercise, submission_id, path_key, data, create_data=None):
+        """
+        Updates the feedback of the submission, if it exists (aplus resend action
+        for example), or creates a new version, which supersedes the older ones.
+        Values in create_data are used only for new feedback.
+
+        Returns tuple (feedback, created).
+        """
+        data = {k: v for k, v in data.items() if v is not None}
+        if 'form_data' in data and 'text_answers' not in data:
+            data['text_answers'] = cls.extract_text_answers(data.get('form'), data['form_data'])
+        create_data = {k: v for k, v in (create_data or {}).items() if v is not None}
+        if connection.vendor == 'postgresql':
+            return cls._upsert_version_pg(exercise, submission_id, path_key, data, create_data)
+        return cls._upsert_version_orm(exercise, submission_id, path_key, data, create_data)
+
+    @classmethod
+    def _upsert_version_orm(cls, exercise, submission_id, path_key, data, create_data):
+        # find if there is submission we should update
+        try:
+            feedback = cls.objects.get(exercise=exercise, submission_id=submission_id)
+            feedback.exercise = exercise
+        except cls.DoesNotExist:
+            feedback = None
+
+        # update
+        if feedback:
+            for k, v in data.items():
+                setattr(feedback, k, v)
+            feedback.save()
+            return feedback, False
+
+        # will create and save new feedback
+        # will also take care of marking old feedbacks
+        feedback = cls.create_new_version(
+            exercise = exercise,
+            submission_id = submission_id,
+            path_key = path_key,
+            **data,
+            **create_data,
+        )
+        return feedback, True
+
+    @classmethod
+    def _upsert_version_pg(cls, exercise, submission_id, path_key, data, create_data):
+        # Conversation upsert, feedback insert or update and superseding of the
+        # older versions are done in a single statement. Sub-statements of
+        # the CTE see the same snapshot, thus the superseding update does not
+        # touch the new row. Conversation upsert uses a no-op update, so
+        # the id is returned also when the conversation exists.
+        qn = connection.ops.quote_name
+        new = cls(exercise=exercise, course_id=exercise.course_id, submission_id=submission_id,
+                  path_key=path_key, **data, **create_data)
+        fields = [f for f in cls._meta.concrete_fields if not f.primary_key and f.name != 'conversation']
+        conv_fields = {
+            'exercise_id': new.exercise_id,
+            'course_id': new.course_id,
+            'student_id': new.student_id,
+        }
+        sql = UPSERT_VERSION_SQL.format(
+            conversation=qn(Conversation._meta.db_table),
+            conv_columns=', '.join(qn(c) for c in conv_fields),
+            conv_values=', '.join(['%s'] * len(conv_fields)),
+            feedback=qn(cls._meta.db_table),
+            columns=', '.join(qn(f.column) for f in fields),
+            values=', '.join(['%s'] * len(fields)),
+            updates=', '.join(
+                '{0} = EXCLUDED.{0}'.format(qn(f.column))
+                for f in fields if f.name in data
+            ),
+            returning=', '.join(qn(f.column) for f in cls._meta.concrete_fields),
+        )
+        params = list(conv_fields.values()) + [
+            f.get_db_prep_save(f.pre_save(new, True), connection)
+            for f in fields
+        ]
+        feedback = next(iter(cls.objects.raw(sql, params)))
+        created = feedback.__dict__.pop('inserted')
+        feedback.exercise = exercise
+        feedback.student = new.student
+        # raw sql does not send signals, but receivers expect them
+        post_save.send(sender=cls, instance=feedback, created=created, update_fields=None,
+                       raw=False, using=connection.alias)
+        return feedback, created
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.__changed_fields = set()
@@ -642,6 +861,98 @@ class Feedback(models.Model):
         ).update(superseded_by=self)
 
 
+UPSERT_VERSION_SQL = """
+WITH conversation AS (
+    INSERT INTO {conversation} ({conv_columns}) VALUES ({conv_values})
+    ON CONFLICT (exercise_id, student_id) DO UPDATE SET exercise_id = EXCLUDED.exercise_id
+    RETURNING id
+), feedback AS (
+    INSERT INTO {feedback} ({columns}, conversation_id)
+    VALUES ({values}, (SELECT id FROM conversation))
+    ON CONFLICT (exercise_id, submission_id) DO UPDATE SET {updates}
+    RETURNING {returning}, (xmax = 0) AS inserted
+), superseded AS (
+    UPDATE {feedback} AS older SET superseded_by_id = feedback.id
+    FROM feedback
+    WHERE feedback.inserted
+        AND older.exercise_id = feedback.exercise_id
+        AND older.student_id = feedback.student_id
+        AND older.timestamp < feedback.timestamp
+        AND older.superseded_by_id IS NULL
+)
+SELECT * FROM feedback
+"""
+
+
+class FeedbackInbox(models.Model):
+    """
+    Feedback submission waiting to be stored as Feedback.
+    Rows are written by FeedbackSubmissionView, when asynchronous ingestion
+    is enabled, and drained in batches by celery task feedback.process_inbox.
+    Rows, which failed MAX_ATTEMPTS times, are left for the admin.
+    """
+    MAX_ATTEMPTS = 5
+    # claim of a crashed worker is released after this
+    CLAIM_TIMEOUT = datetime.timedelta(minutes=10)
+
+    created = models.DateTimeField(default=timezone.now)
+    path_key = models.CharField(max_length=255)
+    form = models.ForeignKey(FeedbackForm,
+                             related_name='+',
+                             on_delete=models.PROTECT)
+    form_data = models.JSONField(blank=True)
+    max_grade = models.PositiveSmallIntegerField(default=Feedback.MAX_GRADE)
+    post_url = models.URLField()
+    submission_url = models.URLField()
+    student_uid = models.IntegerField(null=True)
+    language = models.CharField(max_length=255, null=True)
+    response_grade = models.PositiveSmallIntegerField(null=True)
+    response_time = models.DateTimeField(null=True)
+
+    # processing
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    claimed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return 'Inbox feedback to {} at {}'.format(self.submission_url, self.created)
+
+    @classmethod
+    def claim(cls, limit):
+        """
+        Claims at most limit rows for processing and returns them.
+        Rows are locked only for the claim, so other workers skip them,
+        and the claim itself keeps them away until CLAIM_TIMEOUT.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            items = list(
+                cls.objects
+                .select_related('form')
+                .filter(attempts__lt=cls.MAX_ATTEMPTS)
+                .filter(Q(claimed=None) | Q(claimed__lt=now - cls.CLAIM_TIMEOUT))
+                .select_for_update(skip_locked=True, of=('self',))
+                [:limit]
+            )
+            if items:
+                cls.objects.filter(id__in=[item.id for item in items]).update(claimed=now)
+        return items
+
+    def release(self, error):
+        """Records a failed attempt and returns the row back to the inbox"""
+        self.attempts += 1
+        self.last_error = "{}: {}".format(error.__class__.__name__, error)
+        self.claimed = None
+        FeedbackInbox.objects.filter(id=self.id).update(
+            attempts=models.F('attempts') + 1,
+            last_error=self.last_error,
+            claimed=None,
+        )
+
+
 class FeedbackTag(ColorTag):
     course = models.ForeignKey(Course,
                                related_name="tags",
@@ -728,7 +1039,132 @@ class ContextTag(models.Model):
     def render_tag(self, tooltip="", value="") -> str:
         return render_context_tag(self, tooltip, value)
 
+    @property
+    def is_literal(self) -> bool:
+        return re.escape(self.response_value) == self.response_value
+
+    def clean(self):
+        super().clean()
+        try:
+            re.compile(self.response_value)
+        except (re.error, TypeError) as e:
+            raise ValidationError({
+                'response_value': _("Invalid regex pattern: {error}").format(error=e),
+            }) from e
+
     def __str__(self):
         return 'ContextTag({!r}, {!r}, {!r})'.format(
             self.question_key, self.response_value, self.content
         )
+
+
+class ContextTagMatcher:
+    """
+    Finds context tags for response values. Response values without regex
+    special characters are matched with a dict lookup and the rest with
+    precompiled patterns. Matching tags are returned in the order of the tags.
+    """
+    def __init__(self, tags):
+        self.literals = {} # {question_key: {response_value: [(index, tag)]}}
+        self.patterns = {} # {question_key: [(index, pattern, tag)]}
+        for index, tag in enumerate(tags):
+            key = tag.question_key
+            if tag.is_literal:
+                self.literals.setdefault(key, {}).setdefault(tag.response_value, []).append((index, tag))
+                continue
+            try:
+                pattern = re.compile(tag.response_value)
+            except re.error:
+                # saved before the patterns were validated
+                continue
+            self.patterns.setdefault(key, []).append((index, pattern, tag))
+
+    def __contains__(self, question_key):
+        return question_key in self.literals or question_key in self.patterns
+
+    def match(self, question_key, value):
+        matches = list(self.literals.get(question_key, {}).get(value, ()))
+        patterns = self.patterns.get(question_key)
+        if patterns:
+            matches.extend((i, tag) for i, pattern, tag in patterns if pattern.fullmatch(value))
+            matches.sort(key=lambda m: m[0])
+        return [tag for _i, tag in matches]
+
+
+class NotrespondedCounter(models.Model):
+    """
+    Number of newest unread feedbacks of an exercise, i.e. the feedbacks of
+    FeedbackQuerySet.get_notresponded. In PostgreSQL, rows are maintained
+    by a trigger on the feedback table (see migration 0036), so also bulk
+    updates like superseding are counted. Drift is fixed by reconcile(),
+    which is run periodically by celery task
+    feedback.reconcile_notresponded_counters.
+    """
+    exercise = models.OneToOneField(Exercise,
+                                    related_name='notresponded_counter',
+                                    on_delete=models.CASCADE,
+                                    primary_key=True)
+    course = models.ForeignKey(Course,
+                               related_name='notresponded_counters',
+                               on_delete=models.CASCADE)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return 'Not responded count of {}: {}'.format(self.exercise_id, self.count)
+
+    @staticmethod
+    def is_maintained():
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def get_count(cls, course_id=None, exercise_id=None):
+        """Number of not responded feedbacks of the exercise or the course"""
+        if not cls.is_maintained():
+            return Feedback.objects.get_notresponded(exercise_id=exercise_id, course_id=course_id).count()
+        if exercise_id is not None:
+            counters = cls.objects.filter(exercise_id=exercise_id)
+        elif course_id is not None:
+            counters = cls.objects.filter(course_id=course_id)
+        else:
+            raise ValueError("exercise_id or course_id is required")
+        return counters.aggregate(total=models.Sum('count'))['total'] or 0
+
+    @classmethod
+    def reconcile(cls):
+        """
+        Recounts the counters from the feedbacks. Returns the number of
+        counters, which were changed.
+        """
+        if not cls.is_maintained():
+            return 0
+        qn = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            # blocks the triggers, so counts of uncommitted feedbacks are
+            # not lost in the recount
+            cursor.execute('LOCK TABLE {} IN EXCLUSIVE MODE'.format(qn(cls._meta.db_table)))
+            cursor.execute(RECONCILE_COUNTERS_SQL.format(
+                counter=qn(cls._meta.db_table),
+                feedback=qn(Feedback._meta.db_table),
+            ))
+            return cursor.rowcount
+
+
+# Counts are compared with IS DISTINCT FROM to update only the changed rows
+RECONCILE_COUNTERS_SQL = """
+WITH actual AS (
+    SELECT exercise_id, course_id, count(*) AS count
+    FROM {feedback}
+    WHERE superseded_by_id IS NULL AND response_time IS NULL
+    GROUP BY exercise_id, course_id
+), changed AS (
+    SELECT coalesce(a.exercise_id, c.exercise_id) AS exercise_id,
+           coalesce(a.course_id, c.course_id) AS course_id,
+           coalesce(a.count, 0) AS count
+    FROM actual a
+    FULL OUTER JOIN {counter} c ON c.exercise_id = a.exercise_id
+    WHERE c.count IS DISTINCT FROM coalesce(a.count, 0)
+)
+INSERT INTO {counter} (exercise_id, course_id, count)
+SELECT exercise_id, course_id, count FROM changed
+ON CONFLICT (exercise_id) DO UPDATE SET count = EXCLUDED.count
+"""
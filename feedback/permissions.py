@@ -41,7 +41,7 @@ class AdminOrCourseStaffPermission(Permission):
 class AdminOrFeedbackStaffPermission(Permission):
     def has_permission(self, request, view):
         user = request.user
-        course_id = view.object.exercise.course.id
+        course_id = view.object.course_id
         return (
             user.is_superuser or
             user.is_staff or
@@ -53,7 +53,7 @@ class AdminOrTagStaffPermission(Permission):
     def has_permission(self, request, view):
         user = request.user
         feedback, _tag = view.tag_objects
-        course_id = feedback.exercise.course.id
+        course_id = feedback.course_id
         return (
             user.is_superuser or
             user.is_staff or
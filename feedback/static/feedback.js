@@ -388,6 +388,45 @@ $(function() {
     });
   }
 
+  /* replace response summary with the response form loaded with ajax */
+  function load_response_form(e) {
+    e.preventDefault();
+    var button = $(this);
+    var panel = button.closest('.lazy-response-form');
+    var panel_id = '#' + panel.attr('id');
+    var url = panel.data('url');
+    button.prop('disabled', true);
+    clear_status_tags(panel);
+    add_status_tag(panel, "Loading...", "default");
+
+    $.ajax({
+      type: 'GET',
+      url: url,
+      success: function(data) {
+        var new_panel = $(data).find(panel_id);
+        if (new_panel.length > 0) {
+          panel.replaceWith(new_panel);
+          on_form_insert(new_panel);
+        } else {
+          // Probably login form...
+          clear_status_tags(panel);
+          add_status_tag(panel, "Unknown error", "danger");
+          button.prop('disabled', false);
+        }
+      },
+      timeout: 10000,
+      error: function(xhr, textStatus, error) {
+        clear_status_tags(panel);
+        if (textStatus == "timeout") {
+          add_status_tag(panel, "Loading timeouted!", "danger");
+        } else {
+          add_status_tag(panel, "Server returned " + xhr.status, "danger");
+        }
+        button.prop('disabled', false);
+      },
+    });
+  }
+
   /* color tags */
   function ajax_set_tag_state() {
     var me = $(this);
@@ -478,6 +517,96 @@ $(function() {
     });
   }
 
+  /* response statuses of a page are polled in batches per status list url */
+  var status_polls = {};
+
+  function add_response_status(span, nohover) {
+    var self = $(span);
+    var url = self.data('batchurl');
+    if (!url) {
+      setTimeout(update_response_status, 2000, span, nohover);
+      return;
+    }
+    var poll = status_polls[url];
+    if (!poll)
+      poll = status_polls[url] = {spans: {}, etag: null, timer: null};
+    poll.spans[self.data('feedback-id')] = span;
+    if (!poll.timer)
+      poll.timer = setTimeout(poll_response_statuses, 2000, url, nohover);
+  }
+
+  function poll_response_statuses(url, nohover) {
+    var poll = status_polls[url];
+    poll.timer = null;
+    // forget statuses, which are not on the page anymore
+    $.each(Object.keys(poll.spans), function(i, id) {
+      if (!document.documentElement.contains(poll.spans[id]))
+        delete poll.spans[id];
+    });
+    var ids = Object.keys(poll.spans);
+    if (ids.length == 0)
+      return;
+    var headers = {};
+    if (poll.etag)
+      headers['If-None-Match'] = poll.etag;
+    var schedule = function() {
+      if (!poll.timer && Object.keys(poll.spans).length > 0)
+        poll.timer = setTimeout(poll_response_statuses, 2000, url, nohover);
+    };
+    $.ajax({
+      type: 'GET',
+      url: url,
+      data: {ids: ids.join(',')},
+      timeout: 5000,
+      headers: headers,
+      success: function(data, textStatus, xhr) {
+        if (xhr.status == 200 && data && data.statuses) {
+          poll.etag = xhr.getResponseHeader('ETag');
+          $.each(data.statuses, function(id, status) {
+            if (poll.spans[id])
+              update_response_status_span(poll, id, status, nohover);
+          });
+        }
+        schedule();
+      },
+      error: function(xhr, textStatus, error) {
+        console.log("Status update failed '" + textStatus + "' return code " + xhr.status);
+        schedule();
+      },
+    });
+  }
+
+  function update_response_status_span(poll, id, status, nohover) {
+    var span = $(poll.spans[id]);
+    var tt = bootstrap.Tooltip.getInstance(span[0]);
+    if (status.ok) {
+      if (tt) try { tt.dispose(); } catch(_) {}
+      span.remove();
+      delete poll.spans[id];
+      return;
+    }
+    if (String(status.code) == String(span.data('code')) && status.attempts == span.data('attempts'))
+      return;
+    span.data('code', status.code).attr('data-code', status.code);
+    span.data('attempts', status.attempts);
+    span.removeClass('text-bg-danger text-bg-secondary')
+      .addClass(status.code ? 'text-bg-danger' : 'text-bg-secondary')
+      .text(status.code ? 'upload status ' + status.code : 'Uploading');
+    if (status.code && !nohover) {
+      var when = status.when ? new Date(status.when).toLocaleString() : '';
+      var title = 'Upload is <b>not</b> ok.<br>Tried ' + status.attempts + ' times.<br>' +
+        'Last tried ' + when + ' with status ' + status.code + '.';
+      if (tt) try { tt.dispose(); } catch(_) {}
+      span.attr({
+        'data-bs-toggle': 'tooltip',
+        'data-bs-trigger': 'hover',
+        'data-bs-placement': 'top',
+        'data-bs-html': 'true',
+        'title': title,
+      });
+      try { bootstrap.Tooltip.getOrCreateInstance(span[0]); } catch(_) {}
+    }
+  }
 
   /* test for broken apple mobile devices */
   function is_apple_mobile() {
@@ -522,6 +651,7 @@ $(function() {
     dom.find('textarea.textarea, textarea.track-change').on('keydown', on_key_down);
     dom.find('button.colortag').on('click', ajax_set_tag_state);
     dom.find('.stateful').on('state_change', on_state_change);
+    dom.find('.open-response-form').on('click', load_response_form);
 
     // enable showing styling buttons on click when they don't fit
     dom.find('.toggle-styling-buttons').each((i, elem) => {
@@ -569,8 +699,7 @@ $(function() {
 
     // timeouts
     dom.find('.upload-status').each(function() {
-      var span = this;
-      setTimeout(update_response_status, 2000, span, nohover);
+      add_response_status(this, nohover);
     });
   }
 
@@ -15,9 +15,46 @@ $(function () {
   $('.collapse-on-load').collapse();
 
   $("#id_feedbackfilter_response_grade").replaceCheckboxesWithButtons();
-  $('#filter-form select').chosen({disable_search_threshold: 10});
+  $('#filter-form select.autocomplete-select').each(function () {
+    setupAutocompleteSelect(this);
+  });
+  $('#filter-form select').not('.autocomplete-select').chosen({disable_search_threshold: 10});
 });
 
+/* Select, whose options are searched from the url in data-url
+(see AutocompleteSelect in filters.py). Only the empty and the selected
+option are kept, when the search results are updated. */
+function setupAutocompleteSelect(select) {
+  const $select = $(select);
+  const url = $select.data('url');
+  const minLength = 2;
+  let timer = null;
+  let request = null;
+
+  $select.chosen({disable_search_threshold: 0, search_contains: true});
+  const $search = $select.next('.chosen-container').find('.chosen-search input');
+
+  $search.on('input', function () {
+    const term = this.value.trim();
+    clearTimeout(timer);
+    if (term.length < minLength) return;
+    timer = setTimeout(function () {
+      if (request) request.abort();
+      request = $.getJSON(url, {q: term}, function (data) {
+        $select.find('option').not(':selected').not('[value=""]').remove();
+        const selected = $select.val();
+        for (const result of data.results) {
+          if (String(result.id) === selected) continue;
+          $select.append($('<option>').val(result.id).text(result.text));
+        }
+        $select.trigger('chosen:updated');
+        // chosen:updated resets the search field
+        $search.val(term).trigger('keyup');
+      });
+    }, 250);
+  });
+}
+
 /* Check whether the extra filters were collapsed or not previously and set
 to same state */
 function setExtraFiltersCollapsedStatus() {
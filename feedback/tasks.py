@@ -3,12 +3,18 @@ from datetime import datetime, timezone
 from celery import shared_task
 from celery.exceptions import Ignore
 from celery.utils.log import get_task_logger
+from django.core.cache import cache
+
+from jutut.appsettings import app_settings
 
 from .models import (
     Feedback,
+    FeedbackInbox,
     Course,
+    NotrespondedCounter,
     StudentTag,
 )
+from .ingestion import process_inbox_item
 from .utils import update_response_to_aplus
 
 
@@ -92,3 +98,47 @@ def update_student_tags(self): # pylint: disable=unused-argument
         if datetime.now(timezone.utc) < course_end:
             # update tags
             StudentTag.update_from_api(client, course)
+
+
+@task
+def reconcile_notresponded_counters(self): # pylint: disable=unused-argument
+    # counters are maintained by a database trigger, this fixes any drift
+    changed = NotrespondedCounter.reconcile()
+    if changed:
+        logger.warning("Fixed %d not responded counters", changed)
+
+
+PROCESS_INBOX_KEY = 'feedback.process_inbox'
+
+
+@task
+def process_inbox(self): # pylint: disable=unused-argument
+    # allow new submissions to schedule a new run, while this one is draining
+    cache.delete(PROCESS_INBOX_KEY)
+    batch_size = app_settings.INGESTION_BATCH_SIZE
+    while True:
+        # rows are claimed in a short transaction, so A+ requests are not
+        # made while holding locks, and every item is stored on its own
+        items = FeedbackInbox.claim(batch_size)
+        for item in items:
+            try:
+                feedback, created = process_inbox_item(item)
+            except Exception as err: # pylint: disable=broad-except
+                logger.warning("Failed to process inbox feedback %d: %s", item.id, err)
+                item.release(err)
+                continue
+            # A+ was told that a resent submission waits for grading,
+            # so upload the existing response again
+            if not created and feedback.responded:
+                upload = async_response_upload(feedback)
+                feedback.save(update_fields=[])
+                upload()
+        if len(items) < batch_size:
+            return
+
+
+def schedule_inbox_processing():
+    # only one run is scheduled at a time, periodic task handles the rest
+    if cache.add(PROCESS_INBOX_KEY, 1, 5 * 60):
+        t = process_inbox.delay()
+        logger.debug("Scheduling inbox processing: %s", t.task_id)
@@ -1,6 +1,7 @@
 from typing import Optional
 
 from django import template
+from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.forms.utils import flatatt
 from django.utils.translation import gettext_lazy as _
 
@@ -80,6 +81,21 @@ def studenttags_for_course(user, course):
     return user.tags.all().filter(course=course).order_by('name')
 
 
+@register.simple_tag(takes_context=True)
+def cached_naturaltime(context, value):
+    """
+    naturaltime of the value. When the html is cached (see
+    CachedConversationHtml), a placeholder is rendered instead, which is
+    replaced with the naturaltime when the html is used.
+    """
+    if value is None:
+        return ''
+    placeholder = context.get('naturaltime_placeholder')
+    if placeholder:
+        return '%s%d' % (placeholder, value.timestamp())
+    return naturaltime(value)
+
+
 @register.filter(name="add_bs_class", is_safe=True)
 def add_bs_class(field, css):
     """
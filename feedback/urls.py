@@ -1,12 +1,8 @@
-from django.conf import settings
 from django.urls import re_path
-from django.views.decorators.cache import cache_page
 from .apps import FeedbackConfig
 from . import views
 
-cache = cache_page(60 * 15) if not settings.DEBUG else lambda x: x
-
-FeedbackSubmissionView_view = cache(views.FeedbackSubmissionView.as_view())
+FeedbackSubmissionView_view = views.FeedbackSubmissionView.as_view()
 ManageCourseListView_view = views.ManageCourseListView.as_view()
 ManageNotRespondedListView_view = views.ManageNotRespondedListView.as_view()
 UserListView_view = views.UserListView.as_view()
@@ -67,6 +63,9 @@ urlpatterns = [
     re_path(r'^manage/(?P<course_id>\d+)/byuser/(?P<user_id>\d+)/$',
         UserFeedbackListView_view,
         name='byuser'),
+    re_path(r'^manage/(?P<course_id>\d+)/students/$',
+        views.StudentSearchView.as_view(),
+        name='student-search'),
     re_path(r'^manage/(?P<course_id>\d+)/tags/$',
         views.FeedbackTagListView.as_view(),
         name='tags'),
@@ -94,6 +93,9 @@ urlpatterns = [
     re_path(r'^manage/status/(?P<feedback_id>\d+)/$',
         views.ResponseStatusView.as_view(),
         name='status'),
+    re_path(r'^manage/(?P<course_id>\d+)/upload-status/$',
+        views.ResponseStatusListView.as_view(),
+        name='status-list'),
     re_path(r'^manage/tag/(?P<conversation_id>\d+)/$',
         views.FeedbackTagView.as_view(),
         name='tag-list'),
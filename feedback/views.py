@@ -1,5 +1,4 @@
 import logging
-import re
 from typing import (
     Any,
     Callable,
@@ -7,9 +6,12 @@ from typing import (
     Tuple,
 )
 from collections import Counter
+from hashlib import sha1
 from functools import partial
-from urllib.parse import urlsplit, urljoin, urlencode
+from urllib.parse import urlsplit, urljoin, urlencode, quote_plus
 
+from django.conf import settings
+from django.core.paginator import InvalidPage
 from django.forms import Form
 from django.http import (
     HttpResponse,
@@ -17,24 +19,31 @@ from django.http import (
     HttpResponseBadRequest,
     Http404,
     HttpRequest,
+    JsonResponse,
 )
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.utils.text import slugify
 from django.utils.timezone import now as timezone_now
 from django.utils.translation import get_language, gettext_lazy as _
 from django.shortcuts import get_object_or_404
 from django.views.generic import FormView, ListView, DetailView, UpdateView, DeleteView, TemplateView, View
 from django.urls import reverse
-from django.core.exceptions import SuspiciousOperation
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef, Prefetch, Subquery, Sum
 from django.utils.functional import cached_property
 from django.utils.text import format_lazy
 from django.contrib import messages
 
+from lib.pagination import CursorPaginator
 from lib.postgres import PgAvg
 from lib.mixins import CSRFExemptMixin, ConditionalMixin
 from lib.views import ListCreateView
 from lib.helpers import is_ajax, pick_localized
 from aplus_client.client import AplusTokenClient
 from aplus_client.django.views import AplusGraderMixin
+from jutut.appsettings import app_settings
 
 from .models import (
     Site,
@@ -45,17 +54,28 @@ from .models import (
     Conversation,
     Feedback,
     FeedbackForm,
+    FeedbackInbox,
     FeedbackTag,
     ContextTag,
 )
 from .cached import (
+    CacheBatch,
+    CachedContextTagMatcher,
+    CachedConversationCount,
+    CachedConversationHtml,
     CachedForm,
+    CachedFormHtml,
     CachedSites,
     CachedCourses,
     CachedTags,
     CachedNotrespondedCount,
     MiscCache,
     BackgroundCache,
+    ConversationVersions,
+    CourseMarkupVersions,
+    ExerciseVersions,
+    StudentVersions,
+    FormCache,
 )
 from .forms import (
     ResponseForm,
@@ -65,6 +85,13 @@ from .forms import (
 )
 from .forms_dynamic import DynamicFeedbacForm
 from .filters import FeedbackFilter
+from .ingestion import (
+    SuspiciousStudent,
+    get_grading_fields,
+    resolve_exercise,
+    resolve_student,
+    store_feedback,
+)
 from .permissions import (
     CheckManagementPermissionsMixin,
     AdminOrSiteStaffPermission,
@@ -72,6 +99,7 @@ from .permissions import (
     AdminOrFeedbackStaffPermission,
     AdminOrTagStaffPermission,
 )
+from .tasks import schedule_inbox_processing
 from .utils import (
     get_url_reverse_resolver,
     obj_with_attrs,
@@ -86,10 +114,6 @@ logger = logging.getLogger('jutut.feedback')
 # -------------------------
 
 
-class SuspiciousStudent(SuspiciousOperation):
-    pass
-
-
 class FeedbackAverageView(ListView):
     """Example of postgresql json aggregation. Remove when used in analysis"""
     # NOTE: not linked in urls.py. exists to remind how annotates work
@@ -157,7 +181,7 @@ class FeedbackSubmissionView(CSRFExemptMixin, AplusGraderMixin, FormView):
 
         if form_obj:
             self.form_obj = form_obj
-            auto_id = "jutut_{}_%s".format(slugify(post_url.path or path_key))
+            self.form_auto_id = auto_id = "jutut_{}_%s".format(slugify(post_url.path or path_key))
             try:
                 self.form_class = form_class = partial(form_obj.form_class, auto_id=auto_id)
             except AttributeError as e:
@@ -175,35 +199,33 @@ class FeedbackSubmissionView(CSRFExemptMixin, AplusGraderMixin, FormView):
         cache_key = self.form_cache_key
         if cache_key:
             form_obj_id = getattr(self.form_obj, 'id', None)
+            # the form spec in the shared grading data may be as old as the cached form
+            self.aplus_client.reload_grading_data()
             CachedForm.clear(cache_key)
             self.form_class = None
             self.get_form_class()
             return form_obj_id != self.form_obj.id
         return False
 
-    def get_student(self, namespace):
-        student = None
-
-        # Try to resolve student using uid from query parameters
+    def get_student_uid(self):
         uids = self.request.GET.get('uid', '').split('-')
         if len(uids) > 1:
             raise SuspiciousStudent("Multiple uids in query uid field")
-        if len(uids) == 1 and uids[0]:
-            try:
-                student = Student.objects.using_namespace(namespace).get(api_id=uids[0])
-            except (Student.DoesNotExist, ValueError):
-                pass
+        try:
+            return int(uids[0]) if uids[0] else None
+        except ValueError:
+            return None
 
-        # Fallback to resolve student from grading_data
-        if not student:
-            students = self.grading_data.submitters
-            if not students:
-                raise SuspiciousStudent("Failed to resolve students")
-            if len(students) != 1:
-                raise SuspiciousStudent("Multiple students in submission. Feedback expects only one")
-            student, _created = Student.objects.get_new_or_updated(students[0], namespace=namespace)
+    def get_student(self, namespace):
+        # Try to resolve student using uid from query parameters
+        # and fallback to resolve student from grading_data
+        return resolve_student(self.grading_data, namespace, self.get_student_uid())
 
-        return student
+    def get_max_grade(self):
+        max_grade = self.max_points
+        if max_grade is None:
+            return Feedback.MAX_GRADE
+        return min(max_grade, Feedback.MAX_GRADE)
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
@@ -212,38 +234,52 @@ class FeedbackSubmissionView(CSRFExemptMixin, AplusGraderMixin, FormView):
         context['aplus_path'] = self.submission_url
         return context
 
-    def form_valid(self, form): # pylint: disable=too-many-locals
+    def render_to_response(self, context, **response_kwargs):
+        # Empty forms are the same for all students, so those are rendered
+        # once per language and the student specific urls are replaced
+        if self.request.method != 'GET' or settings.DEBUG or response_kwargs:
+            return super().render_to_response(context, **response_kwargs)
+
+        def render(post_url, aplus_path, form_id):
+            context.update(post_url=post_url, aplus_path=aplus_path, form_id_suffix=form_id)
+            response = super(FeedbackSubmissionView, self).render_to_response(context)
+            return response.render().content.decode(response.charset)
+
+        html = CachedFormHtml.get(
+            self.form_obj.sha1,
+            get_language(),
+            self.path_key,
+            self.form_auto_id,
+            render,
+        )
+        return HttpResponse(CachedFormHtml.render(html, self.post_url or '', self.submission_url or ''))
+
+    def render_result(self, form, response_time, response_grade, max_grade, feedback=None):
+        status = 'graded' if response_time is not None or not form.is_graded else 'accepted'
+        points = response_grade if form.is_graded else max_grade
+        return self.render_to_response(self.get_context_data(
+            status=status,
+            points=points,
+            max_grade=max_grade,
+            feedback=feedback,
+        ))
+
+    def form_valid(self, form):
+        if app_settings.ASYNC_INGESTION:
+            return self.form_valid_async(form)
+
         gd = self.grading_data
-        path_key = self.path_key
-        exercise_obj = gd.exercise
-        # Fetch the Jutut exercise based on the API ID (exercise ID in the A+ database).
-        # If it does not exist yet, the exercise is created in the Jutut database.
-        # When the exercise is created, the other fields are filled in with
-        # the data from exercise_obj.
-        exercise, _created = Exercise.objects.get_or_create(
-            exercise_obj,
-            select_related=('course', 'course__namespace'),
-        ) if exercise_obj else (None, False)
+        exercise = resolve_exercise(gd)
         if not exercise:
             logger.warning("exercise not resolved from submission_url '%s'", self.submission_url)
             return HttpResponseBadRequest("exercise not found from provided submission_url")
-        # Change the display name to the hierarchical name that always contains
-        # the module and chapter numbers.
-        hierarchical_name = exercise_obj._data.get('hierarchical_name')
-        if hierarchical_name and hierarchical_name != exercise.display_name:
-            exercise.display_name = hierarchical_name
-            exercise.save()
         try:
             student = self.get_student(exercise.namespace)
         except SuspiciousStudent as err:
             logger.warning("failed to resolve student: %s", err)
             return HttpResponseBadRequest(str(err))
 
-        max_grade = self.max_points
-        if max_grade is None:
-            max_grade = Feedback.MAX_GRADE
-        else:
-            max_grade = min(max_grade, Feedback.MAX_GRADE)
+        max_grade = self.get_max_grade()
 
         # Common data for feedback
         data = {
@@ -253,44 +289,46 @@ class FeedbackSubmissionView(CSRFExemptMixin, AplusGraderMixin, FormView):
             'max_grade': max_grade,
             'post_url': self.post_url or '',
             'submission_url': self.submission_url or '',
-            'submission_html_url': gd.html_url,
-            'timestamp': gd.submission_time,
-            'response_seen': gd.feedback_response_seen
+            **get_grading_fields(gd),
         }
 
-        # find if there is submission we should update (aplus resend action for example)
+        # automatically grade if there is no need for human oversight
+        create_data = None
+        if not form.requires_manual_check:
+            create_data = {
+                'response_grade': max_grade,
+                'response_time': timezone_now(),
+            }
+
+        feedback, _created = store_feedback(exercise, gd.submission_id, self.path_key, data, create_data)
+        return self.render_result(form, feedback.response_time, feedback.response_grade,
+                                  feedback.max_grade, feedback=feedback)
+
+    def form_valid_async(self, form):
         try:
-            feedback = Feedback.objects.get(exercise=exercise, submission_id=gd.submission_id)
-            feedback.exercise = exercise
-        except Feedback.DoesNotExist:
-            feedback = None
-
-        # update
-        if feedback:
-            for k, v in data.items():
-                if v is not None:
-                    setattr(feedback, k, v)
-            feedback.save()
-
-        # create
-        else:
-            # automatically grade if there is no need for human oversight
-            if not form.requires_manual_check:
-                data['response_grade'] = max_grade
-                data['response_time'] = timezone_now()
-
-            # will create and save new feedback
-            # will also take care of marking old feedbacks
-            feedback = Feedback.create_new_version(
-                exercise = exercise,
-                submission_id = gd.submission_id,
-                path_key = path_key,
-                **data,
-            )
+            uid = self.get_student_uid()
+        except SuspiciousStudent as err:
+            logger.warning("failed to resolve student: %s", err)
+            return HttpResponseBadRequest(str(err))
+
+        item = FeedbackInbox(
+            path_key=self.path_key,
+            form=self.form_obj,
+            form_data=form.cleaned_data,
+            max_grade=self.get_max_grade(),
+            post_url=self.post_url or '',
+            submission_url=self.submission_url or '',
+            student_uid=uid,
+            language=get_language(),
+        )
+        # automatically grade if there is no need for human oversight
+        if not form.requires_manual_check:
+            item.response_grade = item.max_grade
+            item.response_time = timezone_now()
+        item.save()
+        transaction.on_commit(schedule_inbox_processing)
 
-        status = 'graded' if feedback.responded or not form.is_graded else 'accepted'
-        points = feedback.response_grade if form.is_graded else feedback.max_grade
-        return self.render_to_response(self.get_context_data(status=status, points=points, feedback=feedback))
+        return self.render_result(form, item.response_time, item.response_grade, item.max_grade)
 
     def form_invalid(self, form):
         if self.reload_form_class():
@@ -307,23 +345,31 @@ class FeedbackSubmissionView(CSRFExemptMixin, AplusGraderMixin, FormView):
 class ManageSiteMixin(CheckManagementPermissionsMixin):
     permission_classes = [AdminOrSiteStaffPermission]
 
+    @cached_property
+    def cache_batch(self):
+        return CacheBatch()
+
     def get_context_data(self, **kwargs):
+        batch = self.cache_batch
+        batch.add(CachedSites)
+        site = kwargs.get('site', None)
+        if site:
+            batch.add(CachedCourses, site)
         context = super().get_context_data(**kwargs)
         user = self.request.user
         if user.is_superuser or user.is_staff:
-            context['sitelist'] = CachedSites.get
+            context['sitelist'] = batch.get(CachedSites)
         else:
             visible_sites = self.visible_sites
-            # pylint: disable-next=no-value-for-parameter
-            context['sitelist'] = [site for site in CachedSites.get() if site.id in visible_sites]
+            context['sitelist'] = [site for site in batch.get(CachedSites) if site.id in visible_sites]
         site = context.get('site', None)
         if site:
             context['sitename'] = '.'.join(site.domain.split('.', 2)[:2])
             if user.is_superuser or user.is_staff:
-                courselist = CachedCourses.get(site)
+                courselist = batch.get(CachedCourses, site)
             else:
                 visible_courses = self.visible_courses
-                courselist = [c for c in CachedCourses.get(site) if c.id in visible_courses]
+                courselist = [c for c in batch.get(CachedCourses, site) if c.id in visible_courses]
             # create names for course list entries. Different instances contain instance_name
             dup_courses = frozenset(code for code, count in Counter(c.code for c in courselist).items() if count > 1)
             fmt1 = "{c.code} - {c.name}"
@@ -352,8 +398,10 @@ class ManageCourseMixin(ManageSiteMixin):
         if not course:
             kwargs['course'] = course = self.course
         kwargs.setdefault('site', course.namespace)
+        # read with the site and course lists of ManageSiteMixin
+        self.cache_batch.add(CachedNotrespondedCount, course)
         context = super().get_context_data(**kwargs)
-        context['course_notresponded'] = CachedNotrespondedCount.get(course)
+        context['course_notresponded'] = self.cache_batch.get(CachedNotrespondedCount, course)
         context.setdefault('course_name', str(course))
         return context
 
@@ -419,6 +467,38 @@ class ManageUpdateStudenttagsView(ManageCourseMixin, TemplateView):
         return super().get(request, *args, **kwargs)
 
 
+def prefetch_conversations(feedbacks, course) -> list[Conversation]:
+    """
+    Returns conversations of the feedbacks in the order of the feedbacks.
+    Feedback versions, students, exercises, conversation tags and student
+    tags of the course are loaded with a fixed number of queries.
+    Student tags are stored to conversation.student.course_tags.
+    Forms are not loaded, as they are shared via FormCache.
+    """
+    conversation_ids = list(dict.fromkeys(f.conversation_id for f in feedbacks))
+    conversations = Conversation.objects.filter(
+        id__in=conversation_ids,
+    ).select_related(
+        'student',
+        'exercise',
+    ).prefetch_related(
+        Prefetch(
+            'feedbacks',
+            queryset=Feedback.objects.select_related(
+                'exercise', 'student', 'response_by',
+            ).order_by('timestamp'),
+        ),
+        'tags',
+        Prefetch(
+            'student__tags',
+            queryset=StudentTag.objects.filter(course=course).order_by('name'),
+            to_attr='course_tags',
+        ),
+    )
+    conversations = {c.id: c for c in conversations}
+    return [conversations[i] for i in conversation_ids]
+
+
 def get_tag_list(tags, conversation, get_tag_url=None) -> Tuple[FeedbackTag]:
     active = conversation.tags.all()
     return (
@@ -431,10 +511,16 @@ def get_tag_list(tags, conversation, get_tag_url=None) -> Tuple[FeedbackTag]:
 # pylint: disable-next=too-many-positional-arguments too-many-arguments
 def get_feedback_dict(feedback, get_form, response_form_class,
                       get_post_url=None, get_status_url=None,
-                      active=True) -> dict:
+                      active=True, lazy_form=False) -> dict:
+    """
+    Returns the display data of the feedback. With lazy_form, inactive
+    feedbacks don't get a response form, but the summary template loads
+    it from the post_url when it's opened.
+    """
     form = get_form(feedback)
+    lazy_form = lazy_form and not active and get_post_url is not None
     data = {
-        'form': response_form_class(instance=feedback),
+        'form': None if lazy_form else response_form_class(instance=feedback),
         'feedback': feedback,
         'feedback_form': form,
         'feedback_form_grading': feedback.max_grade > 1 and (form.is_dummy_form or form.is_graded),
@@ -454,22 +540,28 @@ def update_context_for_feedbacks( # noqa
         feedbacks: Optional[list[Feedback]] = None,
         get_form: Optional[Callable[[Feedback], DynamicFeedbacForm]] = None,
         post_url: bool = True,
+        cache_html: bool = False,
+        lazy_forms: bool = False,
         ) -> None:
     # defaults for parameters
     if not course:
         course = context['course']
     if not feedbacks:
         feedbacks = context['object_list']
+    form_cache = FormCache()
     if not get_form:
-        get_form = lambda o: o.get_form_obj(dummy=True) # pylint: disable=unnecessary-lambda-assignment
+        get_form = form_cache.get
     course_id = course.id
+    cache_html = cache_html and app_settings.CONVERSATION_CACHE_TIMEOUT > 0
 
     # get_post_url
     get_post_url = get_url_reverse_resolver(
         'feedback:respond',
         ('feedback_id',),
         lambda f: (f.id,),
-        query={"success_url": request.get_full_path()},
+        query={"success_url": (
+            CachedConversationHtml.SUCCESS_URL if cache_html else request.get_full_path()
+        )},
     ) if post_url else None
 
     # get_status_url
@@ -506,27 +598,52 @@ def update_context_for_feedbacks( # noqa
         query_func=lambda f: {'exercise': f.exercise.id,},
     )
 
+    # group feedbacks by conversation
+    active_ids: dict[int, set[int]] = {}
+    student_ids: dict[int, int] = {}
+    exercise_ids: dict[int, int] = {}
+    for f in feedbacks:
+        active_ids.setdefault(f.conversation_id, set()).add(f.id)
+        student_ids[f.conversation_id] = f.student_id
+        exercise_ids[f.conversation_id] = f.exercise_id
+
+    # request cached values of the page, so they are read with a single round trip
+    batch = CacheBatch()
+    batch.add(CachedTags, course)
+    batch.add(CachedContextTagMatcher, course)
+    bg_q_key = batch.add_key(
+        BackgroundCache.get_key('questionnaires', course) # pylint: disable=no-value-for-parameter
+    )
+    response_keys = {
+        student_id: batch.add_key(
+            BackgroundCache.get_response_key(Student(id=student_id), course) # pylint: disable=no-value-for-parameter
+        )
+        for student_id in student_ids.values()
+    }
+    if cache_html:
+        for conversation_id in active_ids:
+            batch.add(ConversationVersions, conversation_id)
+            batch.add(StudentVersions, student_ids[conversation_id])
+            batch.add(ExerciseVersions, exercise_ids[conversation_id])
+        batch.add(CourseMarkupVersions, course_id)
+
     # get_tag_url
-    tags = CachedTags.get(course)
+    tags = batch.get(CachedTags, course)
     get_tag_url = get_url_reverse_resolver('feedback:tag',
                                            ('conversation_id', 'tag_id'),
                                            lambda c, t: (c.id, t.id))
 
-    course_context_tags = ContextTag.objects.filter(course=course_id)
-    context_tag_groups: dict[str, dict[str, ContextTag]] = {} # {question_key: {response_value: ContextTag}}
-    for tag in course_context_tags:
-        tag_group = context_tag_groups.setdefault(tag.question_key, {})
-        tag_group[tag.response_value] = tag
+    context_tag_matcher = batch.get(CachedContextTagMatcher, course)
 
     # get background questionnaire urls
     client = request.user.get_api_client(course.namespace)
+    bg_q_dict = batch[bg_q_key]
     if client:
-        course_has_bg_questionnaire = (
+        if bg_q_dict is None:
             # pylint: disable-next=no-value-for-parameter
-            len(BackgroundCache.get_or_set_bg_questionnaires(course, client)) > 0
-        )
+            bg_q_dict = BackgroundCache.get_or_set_bg_questionnaires(course, client)
+        course_has_bg_questionnaire = len(bg_q_dict) > 0
     else:
-        bg_q_dict = BackgroundCache.get_bg_questionnaires(course) # pylint: disable=no-value-for-parameter
         course_has_bg_questionnaire = bool(bg_q_dict) and len(bg_q_dict) > 0
         context['errors_title'] = _("Missing A+ API token!")
         context['errors'] = _(
@@ -536,18 +653,45 @@ def update_context_for_feedbacks( # noqa
 
     def student_may_have_bg_questionnaire(student: Student) -> bool:
         # check if student has bg response or it hasn't been fetched yet
-        resp = BackgroundCache.get_response(student, course) # pylint: disable=no-value-for-parameter
+        key = response_keys.get(student.id)
+        if key is None:
+            resp = BackgroundCache.get_response(student, course) # pylint: disable=no-value-for-parameter
+        else:
+            resp = batch[key]
         return (resp is None) or (resp[0] is not None)
 
-    # group feedbacks by conversation
-    convs: dict[Conversation, list[Feedback]] = {}
-    for f in feedbacks:
-        if f.conversation in convs:
-            convs[f.conversation].append(f)
-        else:
-            convs[f.conversation] = [f]
+    # get cached conversations
+    cached_html: dict[int, str] = {}
+    html_keys: dict[int, str] = {}
+    if cache_html:
+        course_version = batch.get(CourseMarkupVersions, course_id)
+        language = get_language()
+        host = request.get_host()
+        for conversation_id, ids in active_ids.items():
+            show_background = (
+                course_has_bg_questionnaire
+                and student_may_have_bg_questionnaire(Student(id=student_ids[conversation_id]))
+            )
+            html_keys[conversation_id] = batch.add_key(CachedConversationHtml.get_key(
+                conversation_id,
+                batch.get(ConversationVersions, conversation_id),
+                course_version,
+                (
+                    batch.get(StudentVersions, student_ids[conversation_id]),
+                    batch.get(ExerciseVersions, exercise_ids[conversation_id]),
+                ),
+                language,
+                (sorted(ids), show_background, bool(tags), host, lazy_forms),
+            ))
+        cached_html = {
+            conversation_id: batch[key]
+            for conversation_id, key in html_keys.items()
+            if batch[key] is not None
+        }
+        csrf_token = get_token(request)
+        success_url = quote_plus(request.get_full_path())
 
-    def get_conversation_dict(conv: Conversation, fbs: list[Feedback]) -> dict:
+    def get_conversation_dict(conv: Conversation, fbs: set[int]) -> dict:
         conv_feedback = [
             get_feedback_dict(
                 f,
@@ -555,29 +699,26 @@ def update_context_for_feedbacks( # noqa
                 response_form_class=ResponseForm,
                 get_post_url=get_post_url,
                 get_status_url=get_status_url,
-                active=(f in fbs)
-            ) for f in conv.feedbacks.all().order_by('timestamp')
+                active=(f.id in fbs),
+                lazy_form=lazy_forms,
+            ) for f in conv.feedbacks.all()
         ]
         # check whether feedback should have context tags, and if so, render them
         context_tags = []
         last_fb_dict = conv_feedback[-1]
-        for key, field in last_fb_dict['feedback_form'].fields.items(): # pylint: disable=too-many-nested-blocks
-            if key in context_tag_groups:
-                r_value = str(last_fb_dict['feedback'].form_data[key])
-                for r_k in context_tag_groups[key].keys():
-                    try:
-                        if re.fullmatch(r_k, r_value):
-                            c_tag = context_tag_groups[key][r_k]
-                            tooltip_text = field.help_text
-                            if hasattr(field, 'choices'):
-                                map_ = dict(field.choices)
-                                display_value = map_[r_value]
-                            else:
-                                display_value = r_value
-                            tooltip_text += " -- " + display_value
-                            context_tags.append(c_tag.render_tag(tooltip_text, r_value))
-                    except re.error:
-                        pass
+        form_data = last_fb_dict['feedback'].form_data
+        for key, field in last_fb_dict['feedback_form'].fields.items():
+            if key not in context_tag_matcher or form_data.get(key) is None:
+                continue
+            r_value = str(form_data[key])
+            for c_tag in context_tag_matcher.match(key, r_value):
+                tooltip_text = field.help_text
+                if hasattr(field, 'choices'):
+                    display_value = str(dict(field.choices).get(r_value, r_value))
+                else:
+                    display_value = r_value
+                tooltip_text += " -- " + display_value
+                context_tags.append(c_tag.render_tag(tooltip_text, r_value))
 
         conv_dict = {
             'id': conv.id,
@@ -596,18 +737,49 @@ def update_context_for_feedbacks( # noqa
             'show_background': course_has_bg_questionnaire and student_may_have_bg_questionnaire(conv.student),
             'context_tags': context_tags,
             'conversation_tags': set(conv.tags.all()),
+            'student_tags': conv.student.course_tags,
             'feedback_list': conv_feedback,
         }
         if tags:
             conv_dict['tags'] = get_tag_list(tags, conv, get_tag_url)
         return conv_dict
 
-    context['conversations'] = [get_conversation_dict(c, fbs) for c, fbs in convs.items()]
+    conversations = prefetch_conversations(
+        [f for f in feedbacks if f.conversation_id not in cached_html],
+        course,
+    )
+    form_cache.prefetch(f for c in conversations for f in c.feedbacks.all())
+    conversations = {
+        c.id: get_conversation_dict(c, active_ids[c.id])
+        for c in conversations
+    }
+    # number of feedback forms built for this request, for profiling
+    context['forms_built'] = form_cache.built
+    logger.debug("Built %d feedback forms for %d conversations", form_cache.built, len(conversations))
+    if cache_html:
+        for conversation_id, conv_dict in conversations.items():
+            html = render_to_string('manage/_conversation.html', {
+                'conv': conv_dict,
+                'course': course,
+                'csrf_token': CachedConversationHtml.CSRF_TOKEN,
+                'naturaltime_placeholder': CachedConversationHtml.NATURALTIME,
+            })
+            CachedConversationHtml.set(html_keys[conversation_id], html)
+            cached_html[conversation_id] = html
+        context['conversations'] = [
+            {'id': i, 'html': mark_safe(CachedConversationHtml.render(cached_html[i], csrf_token, success_url))}
+            for i in active_ids
+        ]
+    else:
+        context['conversations'] = [conversations[i] for i in active_ids]
 
 
 class PaginatedMixin():
     paginate_by = 50
     PAGE_SIZE_CHOICES = ("20", "50", "100", "200")
+    PAGINATION_MODES = ('pages', 'cursor', 'conversations')
+    cursor_ordering = ('-timestamp', '-id')
+    conversation_ordering = ('-feedback_timestamp', '-id')
 
     def get_paginate_by(self, queryset): # pylint: disable=unused-argument
         value = self.request.GET.get('paginate_by')
@@ -615,13 +787,83 @@ class PaginatedMixin():
             self.paginate_by = int(value)
         return self.paginate_by
 
+    @cached_property
+    def pagination_mode(self):
+        mode = self.request.GET.get('pagination')
+        return mode if mode in self.PAGINATION_MODES else self.PAGINATION_MODES[0]
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def get_conversation_ordering(self):
+        return self.conversation_ordering
+
+    def get_conversation_queryset(self, feedbacks):
+        """
+        Returns conversations, which have feedbacks matching the queryset.
+        Feedbacks are used as a semi-join, so the conversations are not
+        multiplied by the feedback versions.
+        """
+        ordering = self.get_conversation_ordering()
+        matching = feedbacks.filter(conversation_id=OuterRef('pk'))
+        conversations = Conversation.objects.filter(course=self.course).filter(Exists(matching))
+        if '-feedback_timestamp' in ordering:
+            order = '-timestamp'
+        elif 'feedback_timestamp' in ordering:
+            order = 'timestamp'
+        else:
+            order = None
+        if order:
+            conversations = conversations.annotate(feedback_timestamp=Subquery(
+                matching.order_by(order).values('timestamp')[:1]
+            ))
+        return conversations.order_by(*ordering)
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        if self.pagination_mode == 'conversations':
+            # conversations with matching feedbacks are counted for the page anyway
+            paginator.count = CachedConversationCount.get(self.course, self.matching_feedbacks)
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.pagination_mode == 'conversations':
+            # select a page of conversations and then load their matching feedbacks
+            self.matching_feedbacks = queryset
+            paginator, page, conversations, is_paginated = super().paginate_queryset(
+                self.get_conversation_queryset(queryset),
+                page_size,
+            )
+            index = {c.id: i for i, c in enumerate(conversations)}
+            feedbacks = sorted(
+                queryset.filter(conversation_id__in=index),
+                key=lambda f: index[f.conversation_id],
+            )
+            return (paginator, page, feedbacks, is_paginated)
+        if self.pagination_mode != 'cursor':
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, self.get_cursor_ordering())
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidPage as e:
+            raise Http404(_("Invalid page: {error}").format(error=e)) from e
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_context_data(self, **kwargs) -> dict:
         context = super().get_context_data(**kwargs)
         context['page_sizes'] = list(map(
             lambda size: (size, int(size) == self.paginate_by),
             self.PAGE_SIZE_CHOICES))
-        feedbacks = context['paginator'].object_list
-        context['total_conversation_count'] = len({f.conversation.id for f in feedbacks})
+        context['pagination_mode'] = self.pagination_mode
+        paginator = context['paginator']
+        if self.pagination_mode == 'conversations':
+            # paginator counts conversations, so matching messages are not counted
+            context['total_conversation_count'] = paginator.count
+        # cursor pagination avoids counting, unless it's requested
+        elif self.pagination_mode != 'cursor' or self.request.GET.get('count'):
+            feedbacks = paginator.queryset if self.pagination_mode == 'cursor' else paginator.object_list
+            context['total_conversation_count'] = CachedConversationCount.get(self.course, feedbacks)
+            context['total_message_count'] = paginator.count
         return context
 
 
@@ -638,7 +880,7 @@ class ManageNotRespondedListView(ManageCourseMixin, PaginatedMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(course=self.course, **kwargs)
         context['path_filter'] = self._path_filter
-        update_context_for_feedbacks(self.request, context)
+        update_context_for_feedbacks(self.request, context, cache_html=True, lazy_forms=True)
         return context
 
 
@@ -648,15 +890,27 @@ class ManageFeedbacksListView(ManageCourseMixin, PaginatedMixin, ListView):
 
     def get_queryset(self):
         course = self.course
-        queryset = Feedback.objects.filter(exercise__course=course)
+        queryset = Feedback.objects.filter(course=course)
         # pylint: disable-next=redefined-builtin
         self.feedback_filter = filter = FeedbackFilter(self.request.GET, queryset, course=course)
         return filter.qs
 
+    def get_order_by(self):
+        order_by = None
+        if self.feedback_filter.is_bound and self.feedback_filter.is_valid():
+            order_by = self.feedback_filter.form.cleaned_data.get('order_by')
+        return order_by or FeedbackFilter.ORDER_BY_DEFAULT
+
+    def get_cursor_ordering(self):
+        return FeedbackFilter.CURSOR_ORDERINGS.get(self.get_order_by(), self.cursor_ordering)
+
+    def get_conversation_ordering(self):
+        return FeedbackFilter.CONVERSATION_ORDERINGS.get(self.get_order_by(), self.conversation_ordering)
+
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(course=self.course, **kwargs)
         context['feedback_filter'] = self.feedback_filter
-        update_context_for_feedbacks(self.request, context)
+        update_context_for_feedbacks(self.request, context, cache_html=True, lazy_forms=True)
         return context
 
 
@@ -801,7 +1055,7 @@ class FeedbackPointsView(CheckManagementPermissionsMixin,
         context = super().get_context_data(**kwargs)
         conv = self.object
         exercise = conv.exercise
-        course = exercise.course
+        course = conv.course
         client = self.request.user.get_api_client(course.namespace)
         if not client:
             context['errors'] = _(
@@ -885,7 +1139,7 @@ class FeedbackMixin(CheckManagementPermissionsMixin):
 
     def get_context_data(self, **kwargs):
         feedback = self.object
-        context = super().get_context_data(course=feedback.exercise.course, **kwargs)
+        context = super().get_context_data(course=feedback.course, **kwargs)
         update_context_for_feedbacks(self.request, context, feedbacks=[feedback], post_url=False)
         return context
 
@@ -936,7 +1190,7 @@ class RespondFeedbackMixin(FeedbackMixin):
         url = self.request.GET.get(self.success_url_param)
         if not url:
             url = reverse('feedback:notresponded-course', kwargs={
-                'course_id': self.object.form.exercise.course.id,
+                'course_id': self.object.course_id,
             })
         return url
 
@@ -966,6 +1220,83 @@ class ResponseStatusView(ConditionalMixin,
         return self.object.response_uploaded.when
 
 
+class ResponseStatusListView(ConditionalMixin,
+                             CheckManagementPermissionsMixin,
+                             ListView):
+    """
+    Upload statuses of feedbacks of the course as JSON. Feedbacks are
+    selected with the ids parameter, e.g. ?ids=1,2,3. ETag is resolved
+    from the latest upload time with a single aggregate query, so polls
+    without changes are answered with 304.
+    """
+    model = Feedback
+    permission_classes = [AdminOrCourseStaffPermission]
+    MAX_IDS = 500
+
+    @cached_property
+    def feedback_ids(self):
+        ids = set()
+        for value in self.request.GET.get('ids', '').split(','):
+            if value.isdigit():
+                ids.add(int(value))
+        return sorted(ids)[:self.MAX_IDS]
+
+    def get_queryset(self):
+        return self.model.objects.filter(
+            id__in=self.feedback_ids,
+            course_id=self.kwargs['course_id'],
+        ).only(
+            'id',
+            '_response_upl_code',
+            '_response_upl_attempt',
+            '_response_upl_at',
+        ).order_by()
+
+    def get_etag(self, request):
+        state = self.get_queryset().aggregate(
+            latest=Max('_response_upl_at'),
+            attempts=Sum('_response_upl_attempt'),
+            count=Count('id'),
+        )
+        ids = sha1(repr(self.feedback_ids).encode('utf-8')).hexdigest()
+        latest = state['latest'].timestamp() if state['latest'] else 0
+        return '{}-{}-{}-{}'.format(ids, latest, state['attempts'] or 0, state['count'])
+
+    def render_to_response(self, context, **response_kwargs):
+        return JsonResponse({'statuses': {
+            feedback.id: feedback.response_uploaded._asdict()
+            for feedback in context['object_list']
+        }}, **response_kwargs)
+
+
+class StudentSearchView(CheckManagementPermissionsMixin, ListView):
+    """
+    Students of the course as JSON for the student autocomplete of the
+    feedback filter. Students are searched with the prefix given in
+    the q parameter, e.g. ?q=smi.
+    """
+    model = Student
+    permission_classes = [AdminOrCourseStaffPermission]
+    MIN_LENGTH = 2
+    MAX_RESULTS = 20
+
+    @cached_property
+    def course(self):
+        return get_object_or_404(Course, pk=self.kwargs['course_id'])
+
+    def get_queryset(self):
+        term = self.request.GET.get('q', '').strip()
+        if len(term) < self.MIN_LENGTH:
+            return self.model.objects.none()
+        return self.model.objects.search_on_course(self.course, term)[:self.MAX_RESULTS]
+
+    def render_to_response(self, context, **response_kwargs):
+        return JsonResponse({'results': [
+            {'id': student.id, 'text': str(student)}
+            for student in context['object_list']
+        ]}, **response_kwargs)
+
+
 def respond_feedback_view_select(normal_view, ajax_view):
     def dispatch(request, *args, **kwargs):
         view = ajax_view if is_ajax(request) else normal_view
@@ -1087,7 +1418,7 @@ class FeedbackTagView(CheckManagementPermissionsMixin, View):
 
     def put(self, *args, **kwargs) -> HttpResponse:
         conversation, tag = self.tag_objects
-        if conversation.exercise.course != tag.course:
+        if conversation.course_id != tag.course_id:
             return HttpResponseBadRequest("Tag and feedback are not part of same course")
         conversation.tags.add(tag)
         return HttpResponse("ok")
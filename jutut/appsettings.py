@@ -6,5 +6,8 @@ app_settings = SettingsDict(
     defaults={
         'TEXT_FIELD_MIN_LENGTH': 2,
         'SERVICE_STATUS': (),
+        'ASYNC_INGESTION': False,
+        'INGESTION_BATCH_SIZE': 100,
+        'CONVERSATION_CACHE_TIMEOUT': 0,
     },
 )
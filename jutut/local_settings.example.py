@@ -19,6 +19,19 @@
 #    ('Celery workers', ('systemctl', 'status', 'www-jutut-celery')),
 #    ('Celery beat', ('systemctl', 'status', 'www-jutut-celerybeat')),
 #)
+# Store feedback submissions to an inbox and process them in celery workers
+#JUTUT['ASYNC_INGESTION'] = False
+# Number of inbox rows processed in a single transaction
+#JUTUT['INGESTION_BATCH_SIZE'] = 100
+# Seconds to cache rendered conversations in feedback lists, 0 disables the cache
+#JUTUT['CONVERSATION_CACHE_TIMEOUT'] = 10 * 60
+
+## A+ api client options
+#from .settings import APLUS_CLIENT
+# Time to live in seconds for cached api objects per model label
+#APLUS_CLIENT['TTL'] = {'feedback.student': 3600, 'feedback.course': 24*3600}
+# Serve stale api objects and refresh them in celery
+#APLUS_CLIENT['STALE_WHILE_REVALIDATE'] = True
 
 ## Database
 #DATABASES = {
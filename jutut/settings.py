@@ -42,6 +42,20 @@ JUTUT = {
         ('Celery workers', ('systemctl', 'status', 'mooc-jutut-celery')),
         ('Celery beat', ('systemctl', 'status', 'mooc-jutut-celerybeat')),
     ),
+    # Store feedback submissions to an inbox and process them in celery workers
+    'ASYNC_INGESTION': False,
+    # Number of inbox rows claimed at once by a worker
+    'INGESTION_BATCH_SIZE': 100,
+    # Seconds to cache rendered conversations in feedback lists, 0 disables the cache
+    'CONVERSATION_CACHE_TIMEOUT': 10 * 60,
+}
+
+## A+ api client options
+APLUS_CLIENT = {
+    # Time to live in seconds for cached api objects per model label
+    'TTL': {},
+    # Serve stale api objects and refresh them in celery
+    'STALE_WHILE_REVALIDATE': False,
 }
 
 
@@ -369,6 +383,18 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': 30 * 60, # every 30 minutes
         'args': (),
     },
+    'feedback.process_inbox': {
+        # process inbox rows, which were not handled by the scheduled task
+        'task': 'feedback.process_inbox',
+        'schedule': 60, # every minute
+        'args': (),
+    },
+    'feedback.reconcile_notresponded_counters': {
+        # recount the not responded counters, which are maintained by a trigger
+        'task': 'feedback.reconcile_notresponded_counters',
+        'schedule': crontab(minute=30), # every hour
+        'args': (),
+    },
     'feedback.update_student_tags': {
         # update student tags for courses that haven't ended yet
         'task': 'feedback.update_student_tags',
@@ -0,0 +1,120 @@
+import datetime
+from functools import reduce
+
+from django.core import signing
+from django.core.paginator import InvalidPage
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+class CursorPage:
+    """
+    Page of a CursorPaginator. Has similar interface as django Page,
+    but instead of page numbers there are opaque cursors to next and
+    previous pages.
+    """
+    is_cursor_page = True
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination. Ordering is a sequence of field names (with '-' prefix
+    for descending order), which must define a unique order for the rows,
+    e.g. ('-timestamp', '-id').
+
+    Pages are selected with a WHERE clause after (or before) the last row of
+    the previous page, so the cost doesn't depend on the position and rows
+    added meanwhile don't shift the pages. Total count is not queried,
+    unless .count is used.
+    """
+    is_cursor = True
+    SALT = 'lib.pagination.CursorPaginator'
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [(o.lstrip('-'), o.startswith('-')) for o in self.ordering]
+
+    @cached_property
+    def count(self):
+        return self.queryset.count()
+
+    def _encode(self, values, forward):
+        values = [v.isoformat() if isinstance(v, datetime.datetime) else v for v in values]
+        return signing.dumps({'o': self.ordering, 'v': values, 'f': forward}, salt=self.SALT, compress=True)
+
+    def _decode(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=self.SALT)
+        except signing.BadSignature as e:
+            raise InvalidPage("Invalid cursor") from e
+        if tuple(data.get('o', ())) != self.ordering or len(data.get('v', ())) != len(self.fields):
+            raise InvalidPage("Cursor doesn't match the ordering")
+        values = [
+            parse_datetime(v) or v if isinstance(v, str) else v
+            for v in data['v']
+        ]
+        return values, bool(data.get('f', True))
+
+    def _after(self, values, forward):
+        """Returns Q for rows after (forward) or before the row with the values"""
+        filters = []
+        for i, (name, desc) in enumerate(self.fields):
+            lookup = 'lt' if desc == forward else 'gt'
+            equal = {self.fields[j][0]: values[j] for j in range(i)}
+            filters.append(Q(**equal, **{'{}__{}'.format(name, lookup): values[i]}))
+        return reduce(Q.__or__, filters)
+
+    def _order_by(self, forward):
+        if forward:
+            return self.ordering
+        return tuple(name if desc else '-' + name for name, desc in self.fields)
+
+    def _values(self, obj):
+        return [getattr(obj, 'cursor_%d' % i) for i in range(len(self.fields))]
+
+    def page(self, cursor=None):
+        qs = self.queryset.annotate(**{
+            'cursor_%d' % i: F(name)
+            for i, (name, _desc) in enumerate(self.fields)
+        })
+        forward = True
+        if cursor:
+            values, forward = self._decode(cursor)
+            qs = qs.filter(self._after(values, forward))
+        rows = list(qs.order_by(*self._order_by(forward))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or not forward:
+                next_cursor = self._encode(self._values(rows[-1]), True)
+            if cursor and (has_more or forward):
+                previous_cursor = self._encode(self._values(rows[0]), False)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
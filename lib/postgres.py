@@ -1,6 +1,8 @@
 # Hstore Aggregates
+from django.db.models import Func, JSONField
 from django.db.models.aggregates import Aggregate
 from django.contrib.postgres import fields
+from django.contrib.postgres.search import SearchVectorField
 
 
 class PgAggregate(Aggregate):
@@ -40,3 +42,58 @@ class PgMin(PgAggregate):
 
 class PgMax(PgAggregate):
     function = "MAX"
+
+
+# Full text search
+# The config is part of the sql, so the expressions are immutable and can be
+# used in expression indexes. Queries must use the same expression to use
+# the index.
+
+class TextToTsvector(Func):
+    """Text field as a tsvector. Null is handled as an empty text."""
+    function = 'to_tsvector'
+    template = "%(function)s('%(config)s'::regconfig, COALESCE(%(expressions)s, ''))"
+    output_field = SearchVectorField()
+
+    def __init__(self, expression, config='simple', **extra):
+        super().__init__(expression, config=config, **extra)
+
+
+class JsonbToTsvector(Func):
+    """String values of a jsonb field as a tsvector, keys are not included."""
+    function = 'jsonb_to_tsvector'
+    template = "%(function)s('%(config)s'::regconfig, %(expressions)s, '[\"string\"]'::jsonb)"
+    output_field = SearchVectorField()
+
+    def __init__(self, expression, config='simple', **extra):
+        super().__init__(expression, config=config, **extra)
+
+
+class JsonbPathQueryArray(Func):
+    """Items selected by the jsonpath as a jsonb array."""
+    function = 'jsonb_path_query_array'
+    template = "%(function)s(%(expressions)s, '%(path)s'::jsonpath)"
+    output_field = JSONField()
+
+    def __init__(self, expression, path, **extra):
+        super().__init__(expression, path=path.replace("'", "''"), **extra)
+
+
+def prefix_tsquery(word):
+    """Returns raw tsquery, which matches lexemes starting with the word"""
+    return "'%s':*" % word.replace('\\', '\\\\').replace("'", "''")
+
+
+def get_extension_version(connection, name):
+    """
+    Returns tuple (available, installed_version) of the extension.
+    installed_version is None, if the extension is not installed.
+    """
+    if connection.vendor != 'postgresql':
+        return (False, None)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT installed_version FROM pg_available_extensions WHERE name = %s", [name])
+        row = cursor.fetchone()
+    if row is None:
+        return (False, None)
+    return (True, row[0])
@@ -109,7 +109,7 @@ class TimeUsageView(ManageCourseMixin, ListView):
 
     def get_queryset(self):
         course = self.course
-        queryset = Feedback.objects.filter(exercise__course=course, superseded_by=None)
+        queryset = Feedback.objects.filter(course=course, superseded_by=None)
         # pylint: disable-next=redefined-builtin
         self.feedback_filter = filter = FeedbackFilter(self.request.GET, queryset, course=course)
         return filter.qs